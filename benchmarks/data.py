@@ -0,0 +1,198 @@
+"""
+Bulk generator of synthetic university data: schools, departments, courses,
+honors courses, users and role assignments.
+
+Everything is written with bulk inserts, in batches, so 10^7 UserRole rows
+take minutes rather than hours. The RolePermission rows or permission masks
+the storage mode expects are written as well.
+"""
+
+import random
+from typing import Dict, List, NamedTuple
+
+
+class Scale(NamedTuple):
+    schools: int
+    departments: int
+    courses: int
+    honors_courses: int
+    users: int
+    roles: int
+
+    @classmethod
+    def for_roles(cls, roles: int) -> "Scale":
+        """
+        Derive the size of every table from the number of UserRole rows.
+        """
+        courses = max(roles // 20, 10)
+        departments = max(courses // 50, 2)
+        return cls(
+            schools=max(departments // 20, 1),
+            departments=departments,
+            courses=courses,
+            honors_courses=max(courses // 10, 1),
+            users=max(roles // 10, 10),
+            roles=roles,
+        )
+
+
+# Share of the role assignments given to each role class.
+ROLE_MIX = [
+    ("courseviewer", 0.70),
+    ("courseowner", 0.20),
+    ("departmentowner", 0.08),
+    ("schoolowner", 0.02),
+]
+
+
+class Dataset(NamedTuple):
+    scale: Scale
+    users: List[int]
+    schools: List[int]
+    departments: List[int]
+    courses: List[int]
+    honors_courses: List[int]
+
+
+def _bulk_create(model, objs, batch_size):
+    batch = []
+    for obj in objs:
+        batch.append(obj)
+        if len(batch) == batch_size:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def _ids(model) -> List[int]:
+    return list(model.objects.order_by("pk").values_list("pk", flat=True))
+
+
+def generate(scale: Scale, batch_size: int = 10_000, seed: int = 0) -> Dataset:
+    from django.contrib.auth import get_user_model
+    from django.contrib.contenttypes.models import ContentType
+    from django.db import connection
+
+    from example_project.main.models import Course, Department, HonorsCourse, School
+
+    rng = random.Random(seed)
+    User = get_user_model()
+
+    _bulk_create(
+        School, (School(name=f"school{i}") for i in range(scale.schools)), batch_size
+    )
+    schools = _ids(School)
+    _bulk_create(
+        Department,
+        (
+            Department(name=f"department{i}", school_id=schools[i % len(schools)])
+            for i in range(scale.departments)
+        ),
+        batch_size,
+    )
+    departments = _ids(Department)
+    _bulk_create(
+        Course,
+        (
+            Course(name=f"course{i}", department_id=rng.choice(departments))
+            for i in range(scale.courses)
+        ),
+        batch_size,
+    )
+    courses = _ids(Course)
+
+    # bulk_create() does not support multi-table inheritance, the child rows
+    # are inserted on top of existing courses.
+    honors_courses = courses[-scale.honors_courses :]
+    table = connection.ops.quote_name(HonorsCourse._meta.db_table)
+    column = connection.ops.quote_name(HonorsCourse._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} ({column}) VALUES (%s)",
+            [(course_id,) for course_id in honors_courses],
+        )
+
+    _bulk_create(
+        User, (User(username=f"user{i}") for i in range(scale.users)), batch_size
+    )
+    users = _ids(User)
+
+    content_types = ContentType.objects.get_for_models(Course, Department, School)
+    targets: Dict[str, tuple] = {
+        "courseviewer": (content_types[Course].id, courses),
+        "courseowner": (content_types[Course].id, courses),
+        "departmentowner": (content_types[Department].id, departments),
+        "schoolowner": (content_types[School].id, schools),
+    }
+    remaining = scale.roles
+    for index, (role_class, share) in enumerate(ROLE_MIX):
+        count = remaining if index == len(ROLE_MIX) - 1 else int(scale.roles * share)
+        remaining -= count
+        content_type_id, object_ids = targets[role_class]
+        create_roles(
+            role_class, content_type_id, object_ids, users, count, batch_size, rng
+        )
+
+    return Dataset(scale, users, schools, departments, courses, honors_courses)
+
+
+def create_roles(
+    role_class, content_type_id, object_ids, users, count, batch_size, rng
+):
+    """
+    Assign "count" roles of "role_class", never twice on the same
+    (user, object) pair, with the permissions the storage mode expects.
+    """
+    from django_orca.models import RolePermission, UserRole
+    from django_orca.utils import (
+        PERMISSION_STORAGE_BITMASK,
+        PERMISSION_STORAGE_ROWS,
+        get_permission_mask,
+        get_permission_storage,
+        get_permission_template,
+        get_roleclass,
+    )
+
+    role = get_roleclass(role_class)
+    storage = get_permission_storage()
+    mask = get_permission_mask(role) if storage == PERMISSION_STORAGE_BITMASK else 0
+    template = get_permission_template(role)
+    count = min(count, len(users) * len(object_ids))
+    offset = rng.randrange(len(object_ids))
+
+    for start in range(0, count, batch_size):
+        userroles = []
+        for i in range(start, min(start + batch_size, count)):
+            user_index, hop = i % len(users), i // len(users)
+            userroles.append(
+                UserRole(
+                    user_id=users[user_index],
+                    role_class=role_class,
+                    content_type_id=content_type_id,
+                    object_id=object_ids[
+                        (user_index * 7919 + hop + offset) % len(object_ids)
+                    ],
+                    permission_mask=mask,
+                )
+            )
+        userroles = UserRole.objects.bulk_create(userroles)
+
+        if storage == PERMISSION_STORAGE_ROWS:
+            if userroles and userroles[0].pk is None:
+                # The backend does not return the ids of bulk inserted rows.
+                userroles = list(
+                    UserRole.objects.filter(
+                        role_class=role_class,
+                        user_id__in={ur.user_id for ur in userroles},
+                        permissions__isnull=True,
+                    )
+                )
+            RolePermission.objects.bulk_create(
+                [
+                    RolePermission(role_id=ur.pk, permission_id=perm_id, access=access)
+                    for ur in userroles
+                    for perm_id, access in template.items()
+                ],
+                batch_size=batch_size,
+            )
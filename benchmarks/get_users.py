@@ -0,0 +1,92 @@
+"""
+Compare the JOIN + DISTINCT and the EXISTS implementations of get_users.
+
+    python -m benchmarks.get_users --users 1000000 --roles 10000000
+
+The data is written to a throwaway test database of the configured backend.
+"""
+
+import argparse
+import time
+
+from .environment import setup, test_database
+
+
+def create_data(users, roles, batch_size):
+    from django.contrib.auth import get_user_model
+    from django.contrib.contenttypes.models import ContentType
+    from django_orca.models import UserRole
+
+    from example_project.main.models import Course
+
+    User = get_user_model()
+    for start in range(0, users, batch_size):
+        User.objects.bulk_create(
+            User(username=f"user{i}")
+            for i in range(start, min(start + batch_size, users))
+        )
+    user_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+    # Every user holds roles on the same number of courses, one role per
+    # (user, course) pair so the unique constraint holds.
+    ct_id = ContentType.objects.get_for_model(Course).id
+    for start in range(0, roles, batch_size):
+        UserRole.objects.bulk_create(
+            UserRole(
+                user_id=user_ids[i % users],
+                role_class="courseviewer",
+                content_type_id=ct_id,
+                object_id=i // users + 1,
+            )
+            for i in range(start, min(start + batch_size, roles))
+        )
+
+
+def run(label, query):
+    print(f"== {label}")
+    print(query.query)
+    print(query.explain())
+    start = time.perf_counter()
+    count = len(query.values_list("pk", flat=True))
+    print(f"{count} users in {time.perf_counter() - start:.3f}s\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10**6)
+    parser.add_argument("--roles", type=int, default=10**7)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.contrib.contenttypes.models import ContentType
+    from django_orca.shortcuts import get_users
+
+    from example_project.main.models import Course
+    from example_project.main.roles import CourseViewer
+
+    with test_database():
+        create_data(args.users, args.roles, args.batch_size)
+        course = Course(id=1)
+        User = get_user_model()
+
+        run(
+            "JOIN + DISTINCT, role and object",
+            User.objects.filter(
+                roles__role_class="courseviewer",
+                roles__content_type=ContentType.objects.get_for_model(Course),
+                roles__object_id=course.id,
+            ).distinct(),
+        )
+        run("EXISTS, role and object", get_users(CourseViewer, course))
+        run(
+            "JOIN + DISTINCT, role only",
+            User.objects.filter(roles__role_class="courseviewer").distinct(),
+        )
+        run("EXISTS, role only", get_users(CourseViewer))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Time the main orca operations against synthetic university data.
+
+    python -m benchmarks.run --roles 100000 --output results.json
+
+The data is written to a throwaway test database of the configured backend.
+Every benchmark reports the median and minimum wall time of its repeats and
+the number of queries of one run. With --output, the results are also
+written as JSON along with the commit and the scale, so runs of different
+commits can be compared.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from typing import Callable, Dict, List
+
+from .data import Scale, generate
+from .environment import setup, test_database
+
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+@benchmark
+def has_permission_direct(ctx):
+    user, course = ctx.sample_role("courseowner")
+    return lambda: ctx.shortcuts.has_permission(user, "main.change_course", course)
+
+
+@benchmark
+def has_permission_inherited(ctx):
+    user, department = ctx.sample_role("departmentowner")
+    course = ctx.Course.objects.filter(department=department).first()
+    return lambda: ctx.shortcuts.has_permission(user, "main.change_course", course)
+
+
+@benchmark
+def has_permission_denied(ctx):
+    user = ctx.User.objects.get(pk=ctx.rng.choice(ctx.data.users))
+    course = ctx.Course.objects.get(pk=ctx.rng.choice(ctx.data.courses))
+    return lambda: ctx.shortcuts.has_permission(user, "main.delete_course", course)
+
+
+@benchmark
+def get_perm_qs_for_user(ctx):
+    user, _ = ctx.sample_role("schoolowner")
+    return lambda: list(
+        ctx.getters.get_perm_qs_for_user(user, ctx.Course, "main.view_course")
+    )
+
+
+@benchmark
+def get_objects(ctx):
+    user, _ = ctx.sample_role("courseviewer")
+    return lambda: ctx.shortcuts.get_objects(user)
+
+
+@benchmark
+def get_user_permissions_cached(ctx):
+    user, course = ctx.sample_role("courseowner")
+    from django_orca.utils import get_from_cache
+
+    get_from_cache(user, course, any_object=False)
+    return lambda: get_from_cache(user, course, any_object=False)
+
+
+@benchmark
+def assign_and_remove_roles(ctx):
+    users = list(ctx.User.objects.filter(pk__in=ctx.rng.sample(ctx.data.users, 50)))
+    course = ctx.Course.objects.create(
+        name="benchmark", department_id=ctx.data.departments[0]
+    )
+
+    def run():
+        ctx.shortcuts.assign_roles(users, ctx.roles.CourseViewer, course)
+        ctx.shortcuts.remove_roles(users, ctx.roles.CourseViewer, course)
+
+    return run
+
+
+@benchmark
+def cascade_delete(ctx):
+    users = list(ctx.User.objects.filter(pk__in=ctx.rng.sample(ctx.data.users, 20)))
+    department = ctx.Department.objects.get(pk=ctx.data.departments[0])
+
+    def run():
+        course = ctx.Course.objects.create(name="benchmark", department=department)
+        ctx.shortcuts.assign_roles(users, ctx.roles.CourseViewer, course)
+        course.delete()
+
+    return run
+
+
+class Context:
+    def __init__(self, data, seed):
+        from django.contrib.auth import get_user_model
+        from django_orca import shortcuts
+        from django_orca.auth import getters
+
+        from example_project.main import roles
+        from example_project.main.models import Course, Department
+
+        self.data = data
+        self.rng = random.Random(seed)
+        self.shortcuts = shortcuts
+        self.getters = getters
+        self.roles = roles
+        self.User = get_user_model()
+        self.Course = Course
+        self.Department = Department
+
+    def sample_role(self, role_class):
+        from django_orca.models import UserRole
+
+        userrole = (
+            UserRole.objects.filter(role_class=role_class)
+            .select_related("user")
+            .order_by("?")
+            .first()
+        )
+        return userrole.user, userrole.obj
+
+
+def run_benchmark(name, ctx, repeat) -> Dict:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    func = BENCHMARKS[name](ctx)
+    with CaptureQueriesContext(connection) as queries:
+        func()
+
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "name": name,
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "repeat": repeat,
+        "queries": len(queries),
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--roles", type=int, default=10**4)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument(
+        "benchmarks", nargs="*", help="Only run these benchmarks (default: all)."
+    )
+    args = parser.parse_args()
+
+    setup()
+
+    import django
+    from django.db import connection
+    from django_orca.utils import get_permission_storage
+
+    scale = Scale.for_roles(args.roles)
+    with test_database():
+        start = time.perf_counter()
+        data = generate(scale, args.batch_size, args.seed)
+        print(f"Generated {scale} in {time.perf_counter() - start:.1f}s")
+
+        ctx = Context(data, args.seed)
+        results = []
+        for name in args.benchmarks or BENCHMARKS:
+            result = run_benchmark(name, ctx, args.repeat)
+            results.append(result)
+            print(
+                f"{name:32} {result['median'] * 1000:9.3f}ms median "
+                f"{result['min'] * 1000:9.3f}ms min {result['queries']:4d} queries"
+            )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(
+                {
+                    "commit": get_commit(),
+                    "python": platform.python_version(),
+                    "django": django.get_version(),
+                    "database": connection.vendor,
+                    "storage": get_permission_storage(),
+                    "scale": scale._asdict(),
+                    "results": results,
+                },
+                output,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
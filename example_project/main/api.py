@@ -0,0 +1,24 @@
+from django_orca.rest_framework.fields import ObjectPermissionsField
+from django_orca.rest_framework.filters import ObjectRolePermissionsFilter
+from django_orca.rest_framework.permissions import (
+    ObjectRolePermissions,
+    PermissionLoaderMixin,
+)
+from rest_framework import serializers, viewsets
+
+from .models import Course
+
+
+class CourseSerializer(serializers.ModelSerializer):
+    permissions = ObjectPermissionsField()
+
+    class Meta:
+        model = Course
+        fields = ["id", "name", "department", "permissions"]
+
+
+class CourseViewSet(PermissionLoaderMixin, viewsets.ModelViewSet):
+    queryset = Course.objects.all()
+    serializer_class = CourseSerializer
+    permission_classes = [ObjectRolePermissions]
+    filter_backends = [ObjectRolePermissionsFilter]
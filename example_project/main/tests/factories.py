@@ -13,7 +13,7 @@ class UserFactory(DjangoModelFactory):
     first_name = factory.Faker("first_name")
     last_name = factory.Faker("last_name")
     email = factory.Faker("email")
-    username = factory.Faker("user_name")
+    username = factory.Sequence(lambda n: "user%d" % n)
 
 
 class SchoolFactory(DjangoModelFactory):
@@ -21,7 +21,7 @@ class SchoolFactory(DjangoModelFactory):
         model = School
         django_get_or_create = ["name"]
 
-    name = factory.Faker("word")
+    name = factory.Sequence(lambda n: "school%d" % n)
 
 
 class DepartmentFactory(DjangoModelFactory):
@@ -29,7 +29,7 @@ class DepartmentFactory(DjangoModelFactory):
         model = Department
         django_get_or_create = ["name"]
 
-    name = factory.Faker("word")
+    name = factory.Sequence(lambda n: "department%d" % n)
     school = factory.SubFactory(SchoolFactory)
 
 
@@ -38,7 +38,7 @@ class CourseFactory(DjangoModelFactory):
         model = Course
         django_get_or_create = ["name"]
 
-    name = factory.Faker("word")
+    name = factory.Sequence(lambda n: "course%d" % n)
     department = factory.SubFactory(DepartmentFactory)
 
 
@@ -1,5 +1,11 @@
 import pytest
-from django_orca.shortcuts import get_userroles
+from django.contrib.auth.models import Permission
+from django_orca import registry as registry_module
+from django_orca.exceptions import ImproperlyConfigured, InvalidPermissionAssignment
+from django_orca.models import RolePermission
+from django_orca.registry import registry
+from django_orca.shortcuts import get_userroles, has_permission, set_role_permission
+from django_orca.utils import get_permission_ids, orca_cache
 
 from ..models import Course, Department, User
 from ..roles import CourseOwner, CourseViewer, DepartmentOwner
@@ -54,3 +60,96 @@ def test_post_delete_handler(user: User, course: Course, department: Department)
     assert get_userroles(user).count() == 2
     course.delete()
     assert get_userroles(user).count() == 0
+
+
+@pytest.mark.django_db
+def test_virtual_permissions(settings, user: User, course: Course):
+    settings.ORCA_SETTINGS = {"PERMISSION_STORAGE": "virtual"}
+
+    user.assign_role(CourseViewer, course)
+    assert RolePermission.objects.filter(role__user=user).count() == 0
+    assert {perm.codename for perm in user.get_user_permissions(obj=course)} == {
+        "view_course"
+    }
+    assert user.has_perm("main.view_course", course)
+
+    # Stored rows override the role class definition
+    RolePermission.objects.create(
+        role=get_userroles(user, obj=course).get(),
+        permission=Permission.objects.get(codename="change_course"),
+        access=True,
+    )
+    assert {perm.codename for perm in user.get_user_permissions(obj=course)} == {
+        "view_course",
+        "change_course",
+    }
+
+
+@pytest.mark.django_db
+def test_bitmask_permissions(settings, user: User, course: Course):
+    settings.ORCA_SETTINGS = {"PERMISSION_STORAGE": "bitmask"}
+
+    user.assign_role(CourseViewer, course)
+    assert RolePermission.objects.filter(role__user=user).count() == 0
+    assert get_userroles(user, obj=course).get().permission_mask != 0
+    assert {perm.codename for perm in user.get_user_permissions(obj=course)} == {
+        "view_course"
+    }
+
+    set_role_permission(user, CourseViewer, "main.change_course", course)
+    assert {perm.codename for perm in user.get_user_permissions(obj=course)} == {
+        "view_course",
+        "change_course",
+    }
+
+    set_role_permission(user, CourseViewer, "main.view_course", course, access=False)
+    assert {perm.codename for perm in user.get_user_permissions(obj=course)} == {
+        "change_course"
+    }
+
+    with pytest.raises(InvalidPermissionAssignment):
+        set_role_permission(user, CourseViewer, "main.view_department", course)
+
+
+@pytest.mark.django_db
+def test_bitmask_database_only_permission(settings, user: User, course: Course):
+    settings.ORCA_SETTINGS = {"PERMISSION_STORAGE": "bitmask"}
+    Permission.objects.create(
+        content_type=Permission.objects.get(codename="view_course").content_type,
+        codename="archive_course",
+        name="Can archive course",
+    )
+    orca_cache().clear()
+    user.assign_role(CourseViewer, course)
+
+    with pytest.raises(InvalidPermissionAssignment):
+        set_role_permission(user, CourseViewer, "main.archive_course", course)
+    assert RolePermission.objects.filter(role__user=user).count() == 0
+
+    # The cached template refers to a permission rolled back with the test.
+    orca_cache().clear()
+
+
+@pytest.mark.django_db
+def test_permission_ids_follow_definition(monkeypatch):
+    assert "main.view_department" not in get_permission_ids(CourseViewer)
+
+    monkeypatch.setattr(CourseViewer, "models", CourseViewer.models + [Department])
+    assert "main.view_department" in get_permission_ids(CourseViewer)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("storage", ["rows", "virtual", "bitmask"])
+def test_permission_bits_cap(monkeypatch, settings, storage, user: User, course):
+    settings.ORCA_SETTINGS = {"PERMISSION_STORAGE": storage}
+    user.assign_role(CourseOwner, course)
+    registry.clear_cache()
+
+    # Only bitmask storage is bounded by the size of the permission mask.
+    monkeypatch.setattr(registry_module, "MAX_PERMISSION_BITS", 2)
+    if storage == "bitmask":
+        with pytest.raises(ImproperlyConfigured):
+            has_permission(user, "main.change_course", course)
+    else:
+        assert has_permission(user, "main.change_course", course)
+    registry.clear_cache()
@@ -0,0 +1,169 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django_orca.models import RolePermission
+from django_orca.shortcuts import set_role_permission
+
+from ..models import Course, User
+from ..roles import CourseOwner, CourseViewer, SchoolOwner
+
+
+def export(*args):
+    out = StringIO()
+    call_command("orca_export", *args, stdout=out)
+    return out.getvalue().splitlines()
+
+
+@pytest.mark.django_db
+def test_export_assignments(user: User, course: Course):
+    assert export() == []
+
+    user.assign_role(CourseOwner, course)
+    rows = [json.loads(line) for line in export()]
+    assert rows == [
+        {
+            "user": user.username,
+            "role": "courseowner",
+            "content_type": "main.course",
+            "object_id": course.id,
+        }
+    ]
+
+    lines = export("--format", "csv")
+    assert lines[0] == "user,role,content_type,object_id"
+    assert lines[1] == f"{user.username},courseowner,main.course,{course.id}"
+
+
+@pytest.mark.django_db
+def test_export_effective(user: User, course_factory):
+    course1: Course = course_factory()
+    course2: Course = course_factory(department=course1.department)
+    course_factory()
+
+    user.assign_role(SchoolOwner, course1.department.school)
+    rows = [json.loads(line) for line in export("--effective", "--chunk-size", "1")]
+
+    course_perms = {
+        (row["object_id"], row["permission"])
+        for row in rows
+        if row["content_type"] == "main.course"
+    }
+    assert course_perms == {
+        (course1.id, "main.view_course"),
+        (course1.id, "main.change_course"),
+        (course2.id, "main.view_course"),
+        (course2.id, "main.change_course"),
+    }
+    assert all(
+        row["via"] == "inherited:department__school"
+        for row in rows
+        if row["content_type"] == "main.course"
+    )
+
+
+def sync(*args):
+    out = StringIO()
+    call_command("orca_sync_permissions", *args, stdout=out)
+    return out.getvalue().splitlines()
+
+
+@pytest.mark.django_db
+def test_sync_permissions(monkeypatch, user: User, course: Course):
+    user.assign_role(CourseViewer, course)
+    assert user.get_user_permissions(obj=course) == {
+        RolePermission.objects.get(
+            role__user=user, permission__codename="view_course"
+        ).permission
+    }
+    assert sync("courseviewer") == [
+        "courseviewer: 0 inserted, 0 updated, 0 deleted, 0 overrides kept"
+    ]
+
+    monkeypatch.setattr(
+        CourseViewer, "allow", ["main.view_course", "main.change_course"]
+    )
+    RolePermission.objects.filter(permission__codename="delete_course").delete()
+
+    # The row of "main.change_course" now differs from the definition, as an
+    # override would, so it is kept unless asked otherwise.
+    assert sync("courseviewer", "--chunk-size", "1") == [
+        "courseviewer: 1 inserted, 0 updated, 0 deleted, 1 overrides kept"
+    ]
+    assert sync("courseviewer", "--reset-overrides") == [
+        "courseviewer: 0 inserted, 1 updated, 0 deleted, 0 overrides kept"
+    ]
+    assert {perm.codename for perm in user.get_user_permissions(obj=course)} == {
+        "view_course",
+        "change_course",
+    }
+
+    # Running it again is a no-op
+    assert sync("courseviewer") == [
+        "courseviewer: 0 inserted, 0 updated, 0 deleted, 0 overrides kept"
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("storage", ["rows", "virtual", "bitmask"])
+def test_sync_permissions_keeps_overrides(settings, storage, user: User, course):
+    settings.ORCA_SETTINGS = {"PERMISSION_STORAGE": storage}
+    user.assign_role(CourseViewer, course)
+    set_role_permission(user, CourseViewer, "main.change_course", course)
+    permissions = {perm.codename for perm in user.get_user_permissions(obj=course)}
+    assert permissions == {"view_course", "change_course"}
+
+    assert sync("courseviewer", "--prune") == [
+        "courseviewer: 0 inserted, 0 updated, 0 deleted, 1 overrides kept"
+    ]
+    assert {
+        perm.codename for perm in user.get_user_permissions(obj=course)
+    } == permissions
+
+
+@pytest.mark.django_db
+def test_sync_permissions_to_bitmask(settings, user: User, course: Course):
+    user.assign_role(CourseOwner, course)
+    permissions = user.get_user_permissions(obj=course)
+    assert RolePermission.objects.filter(role__user=user).count() == 4
+
+    settings.ORCA_SETTINGS = {"PERMISSION_STORAGE": "bitmask"}
+    assert sync("courseowner", "--prune") == [
+        "courseowner: 0 inserted, 1 updated, 4 deleted, 0 overrides kept"
+    ]
+    assert RolePermission.objects.filter(role__user=user).count() == 0
+    assert user.get_user_permissions(obj=course) == permissions
+
+
+def explain(*args):
+    out = StringIO()
+    call_command("orca_explain", *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_explain(user: User, course: Course):
+    user.assign_role(SchoolOwner, course.department.school)
+    args = ["--user", str(user.pk), "--model", "main.Course"]
+
+    output = explain(*args, "--perm", "main.change_course")
+    assert "Strategy: in" in output
+    assert "main_course" in output
+    assert "EXPLAIN:" in output
+    assert "direct pk (main.course: courseowner" in output
+    assert "inherited department__school (main.school: schoolowner" in output
+    assert "total: n/a estimated, 1 rows" in output
+
+    output = explain(*args, "--perm", "main.change_course", "--strategy", "exists")
+    assert "Strategy: exists" in output
+    assert "EXISTS" in output
+    assert "total: n/a estimated, 1 rows" in output
+
+    output = explain(*args, "--perm", "main.view_department")
+    assert output == 'No role grants "main.view_department" on main.Course.\n'
+
+    with pytest.raises(CommandError):
+        explain("--user", "0", "--model", "main.Course", "--perm", "main.view_course")
+    with pytest.raises(CommandError):
+        explain("--user", str(user.pk), "--model", "main.Nope", "--perm", "x.y")
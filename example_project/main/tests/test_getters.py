@@ -1,6 +1,20 @@
 import pytest
-from django_orca.auth.getters import get_perm_qs_for_user
-from django_orca.shortcuts import get_userroles, get_users
+from django.contrib.auth.models import AnonymousUser
+from django_orca.auth.getters import (
+    get_perm_exists,
+    get_perm_ids_for_users,
+    get_perm_pairs_for_users,
+    get_perm_qs_for_user,
+)
+from django_orca.shortcuts import (
+    annotate_permissions,
+    get_permissions_for_object,
+    get_permissions_for_objects,
+    get_user_ids_with_permission,
+    get_userroles,
+    get_users,
+    get_users_with_permission,
+)
 
 from ..models import Course, Department, User
 from ..roles import CourseOwner, CourseViewer, DepartmentOwner, SchoolOwner
@@ -28,6 +42,11 @@ def test_get_users(user_factory, course_factory):
 
     assert len(get_users(obj=course1)) == 2
 
+    # A user holding several matching roles is only returned once
+    user1.assign_role(CourseOwner, course1)
+    assert len(get_users(obj=course1)) == 2
+    assert "DISTINCT" not in str(get_users(obj=course1).query)
+
 
 @pytest.mark.django_db
 def test_get_objects(user: User, department: Department, course_factory):
@@ -91,6 +110,33 @@ def test_get_obj_qs(user: User, course_factory):
     assert user.get_objects_qs(model=Course, role_class=CourseViewer).count() == 1
 
 
+@pytest.mark.django_db
+def test_get_obj_qs_inheritance(user: User, course_factory, django_assert_num_queries):
+    course1: Course = course_factory()
+    course2: Course = course_factory(department=course1.department)
+    course3: Course = course_factory()
+    course4: Course = course_factory()
+
+    user.assign_role(DepartmentOwner, course1.department)
+    user.assign_role(SchoolOwner, course3.department.school)
+    user.assign_role(CourseViewer, course4)
+
+    with django_assert_num_queries(1):
+        assert set(user.get_objects_qs(model=Course)) == {
+            course1,
+            course2,
+            course3,
+            course4,
+        }
+    assert set(user.get_objects_qs(model=Course, role_class=DepartmentOwner)) == {
+        course1,
+        course2,
+    }
+    assert set(user.get_objects_qs(model=Course, role_class=CourseViewer)) == {course4}
+    assert set(user.get_objects_qs(model=Course, inherit=False)) == {course4}
+    assert user.get_objects(model=Course) == [course4]
+
+
 @pytest.mark.django_db
 def test_get_userroles(user: User, course_factory):
     course1: Course = course_factory()
@@ -126,3 +172,213 @@ def test_get_perm_qs_for_user(user_factory, course_factory):
     assert course1 not in user2_course_qs
     assert course2 not in user2_course_qs
     assert course3 in user2_course_qs
+
+
+@pytest.mark.django_db
+def test_get_perm_qs_for_user_query(user: User):
+    # In rows storage the condition only reads the UserRoles, the RolePermission
+    # rows are never joined.
+    sql = str(get_perm_qs_for_user(user, Course, "main.change_course").query)
+    assert "main_course" in sql
+    assert "rolepermission" not in sql.lower()
+
+
+@pytest.mark.django_db
+def test_iter_objects(
+    user: User, department: Department, course_factory, django_assert_num_queries
+):
+    courses = course_factory.create_batch(size=5)
+    for course in courses:
+        user.assign_role(CourseOwner, course)
+        user.assign_role(CourseViewer, course)
+    user.assign_role(DepartmentOwner, department)
+
+    objects = user.get_objects()
+    assert len(objects) == 6
+    assert list(user.iter_objects(chunk_size=2)) == objects
+    assert list(user.iter_objects(role_class=CourseViewer)) == courses
+
+    with django_assert_num_queries(4):
+        # One query for the roles, then one per chunk of each model
+        list(user.iter_objects(chunk_size=3))
+
+
+@pytest.mark.django_db
+def test_get_users_with_permission(
+    user_factory, course_factory, django_assert_num_queries
+):
+    course1: Course = course_factory()
+    course2: Course = course_factory(department=course1.department)
+    course3: Course = course_factory()
+
+    owner: User = user_factory()
+    owner.assign_role(CourseOwner, course1)
+    viewer: User = user_factory()
+    viewer.assign_role(CourseViewer, course1)
+    department_owner: User = user_factory()
+    department_owner.assign_role(DepartmentOwner, course1.department)
+    school_owner: User = user_factory()
+    school_owner.assign_role(SchoolOwner, course3.department.school)
+
+    assert set(get_users_with_permission("main.change_course", course1)) == {
+        owner,
+        department_owner,
+    }
+    assert set(get_users_with_permission("main.view_course", course1)) == {
+        owner,
+        viewer,
+        department_owner,
+    }
+    assert set(get_users_with_permission("main.change_course", course3)) == {
+        school_owner
+    }
+    assert not get_users_with_permission("main.delete_course", course2).exists()
+
+    with django_assert_num_queries(1):
+        user_ids = get_user_ids_with_permission(
+            "main.change_course", Course.objects.all()
+        )
+    assert user_ids == {
+        course1.id: {owner.id, department_owner.id},
+        course2.id: {department_owner.id},
+        course3.id: {school_owner.id},
+    }
+    assert get_user_ids_with_permission("main.change_course", [course2]) == {
+        course2.id: {department_owner.id}
+    }
+
+
+@pytest.mark.django_db
+def test_get_perm_ids_for_users(
+    user_factory, course_factory, django_assert_num_queries
+):
+    user1: User = user_factory()
+    user2: User = user_factory()
+    user3: User = user_factory()
+    course1: Course = course_factory()
+    course2: Course = course_factory(department=course1.department)
+    course3: Course = course_factory()
+
+    user1.assign_role(SchoolOwner, course1.department.school)
+    user1.assign_role(CourseOwner, course1)
+    user2.assign_role(CourseViewer, course3)
+    user3.assign_role(CourseOwner, course3)
+
+    users = User.objects.filter(pk__in=[user1.pk, user2.pk])
+    with django_assert_num_queries(1):
+        pairs = list(get_perm_pairs_for_users(users, Course, "main.view_course"))
+    assert sorted(pairs) == sorted(
+        [
+            (user1.id, course1.id),
+            (user1.id, course1.id),
+            (user1.id, course2.id),
+            (user2.id, course3.id),
+        ]
+    )
+
+    assert get_perm_ids_for_users(users, Course, "main.change_course") == {
+        user1.id: {course1.id, course2.id}
+    }
+    assert get_perm_ids_for_users([user3], Course, "main.delete_course") == {
+        user3.id: {course3.id}
+    }
+
+
+@pytest.mark.django_db
+def test_annotate_permissions(user: User, course_factory, django_assert_num_queries):
+    course1: Course = course_factory()
+    course2: Course = course_factory(department=course1.department)
+    course3: Course = course_factory()
+
+    user.assign_role(DepartmentOwner, course1.department)
+    user.assign_role(CourseOwner, course2)
+
+    qs = annotate_permissions(
+        Course.objects.order_by("pk"),
+        user,
+        ["main.view_course", "main.change_course", "main.delete_course"],
+    )
+    with django_assert_num_queries(1):
+        flags = [
+            (course.can_view_course, course.can_change_course, course.can_delete_course)
+            for course in qs
+        ]
+    assert flags == [
+        (True, True, False),
+        (True, True, True),
+        (False, False, False),
+    ]
+
+    # The flags agree with get_perm_qs_for_user
+    for course in qs:
+        assert course.can_change_course == (
+            course in get_perm_qs_for_user(user, Course, "main.change_course")
+        )
+
+    qs = annotate_permissions(Course.objects.all(), user, ["main.add_course"])
+    assert not qs.filter(can_add_course=True).exists()
+    assert qs.get(pk=course3.pk).can_add_course is False
+
+
+@pytest.mark.django_db
+def test_annotate_permissions_anonymous(course_factory):
+    course_factory()
+
+    qs = annotate_permissions(
+        Course.objects.all(), AnonymousUser(), ["main.view_course"]
+    )
+    assert [course.can_view_course for course in qs] == [False]
+    assert not Course.objects.filter(
+        get_perm_exists(AnonymousUser(), Course, "main.view_course")
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_get_permissions_for_object(
+    user: User, course_factory, django_assert_num_queries
+):
+    course1: Course = course_factory()
+    course2: Course = course_factory(department=course1.department)
+    assert get_permissions_for_object(user, course1) == set()
+
+    user.assign_role(CourseViewer, course1)
+    user.assign_role(DepartmentOwner, course1.department)
+    with django_assert_num_queries(1):
+        permissions = get_permissions_for_object(user, course1)
+    assert permissions == {"main.view_course", "main.change_course"}
+
+    user.assign_role(CourseOwner, course2)
+    assert get_permissions_for_object(user, course2) == {
+        "main.view_course",
+        "main.change_course",
+        "main.delete_course",
+    }
+    assert get_permissions_for_object(user, course1.department) == {
+        "main.view_department"
+    }
+
+    # Every permission returned is confirmed by has_permission
+    for perm in get_permissions_for_object(user, course2):
+        assert user.has_perm(perm, course2)
+
+
+@pytest.mark.django_db
+def test_get_permissions_for_objects(
+    user: User, department: Department, course_factory, django_assert_num_queries
+):
+    course1: Course = course_factory(department=department)
+    course2: Course = course_factory(department=department)
+    course3: Course = course_factory()
+
+    user.assign_role(CourseViewer, course1)
+    user.assign_role(DepartmentOwner, department)
+    expected = {
+        course1.pk: {"main.view_course", "main.change_course"},
+        course2.pk: {"main.view_course", "main.change_course"},
+    }
+    with django_assert_num_queries(1):
+        assert get_permissions_for_objects(user, [course1, course2, course3]) == (
+            expected
+        )
+    assert get_permissions_for_objects(user, Course.objects.all()) == expected
+    assert get_permissions_for_objects(user, []) == {}
@@ -1,6 +1,9 @@
 import pytest
+from django_orca.exceptions import ImproperlyConfigured
+from django_orca.registry import registry
+from django_orca.roles import Role
 
-from ..models import Course, Department, User
+from ..models import Course, Department, School, User
 from ..roles import CourseViewer, DepartmentOwner, SchoolOwner
 
 
@@ -54,3 +57,36 @@ def test_model_inheritance(user, honors_course):
     assert not user.has_perm("main.view_course", honors_course)
     user.assign_role(CourseViewer, honors_course)
     assert user.has_perm("main.view_course", honors_course)
+
+
+def test_inheritance_tree(monkeypatch, settings):
+    tree = registry.get_perm_inheritance_tree(Course)
+    assert dict(tree) == {"department": Department, "department__school": School}
+    assert registry.get_perm_inheritance_tree(Course) is tree
+
+    # Paths are cut at the depth bound
+    settings.ORCA_SETTINGS = {"PERMISSION_PARENTS_MAX_DEPTH": 1}
+    assert list(registry.get_perm_inheritance_tree(Course)) == ["department"]
+
+
+def test_inheritance_cycle(monkeypatch):
+    class RoleOptions:
+        permission_parents = ["department"]
+
+    class SchoolViewer(Role):
+        verbose_name = "School Viewer"
+        models = ["main.School"]
+        allow = ["main.view_school"]
+
+    monkeypatch.setattr(School, "RoleOptions", RoleOptions, raising=False)
+    registry.clear_cache()
+    try:
+        with pytest.raises(ImproperlyConfigured, match="form a cycle"):
+            registry.get_perm_inheritance_tree(Course)
+
+        # Cycles are found when a role is registered
+        with pytest.raises(ImproperlyConfigured, match="form a cycle"):
+            registry.register(SchoolViewer)
+        assert SchoolViewer not in registry.roles_map
+    finally:
+        registry.clear_cache()
@@ -0,0 +1,69 @@
+import logging
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.test import Client
+from django_orca.instrumentation import orca_call, orca_profile
+
+from ..models import Course, Department, School, User
+from ..roles import CourseOwner
+
+
+@pytest.mark.django_db
+def test_orca_profile(user: User, course: Course):
+    # The ContentTypes are cached, as in a running process
+    ContentType.objects.get_for_models(Course, Department, School)
+    with orca_profile() as profile:
+        user.assign_role(CourseOwner, course)
+        assert user.has_perm("main.change_course", course)
+        user.remove_role(CourseOwner, course)
+
+    assert [call.name.rsplit(".", 1)[-1] for call in profile.calls] == [
+        "assign_role",
+        "has_permission",
+        "remove_role",
+    ]
+    _, check, remove = profile.calls
+    assert check.queries == 1
+    assert check.rows == 0
+    # The role and its 4 RolePermission rows
+    assert remove.rows == 5
+    assert profile.summary()[check.name]["calls"] == 1
+
+    # Nothing is recorded outside of a profile
+    user.has_perm("main.change_course", course)
+    assert len(profile) == 3
+
+
+@pytest.mark.django_db
+def test_orca_call_signal_and_slow_calls(settings, caplog, user: User, course: Course):
+    calls = []
+
+    def receiver(sender, call, **kwargs):
+        calls.append(call)
+
+    orca_call.connect(receiver)
+    try:
+        user.has_role(CourseOwner, course)
+    finally:
+        orca_call.disconnect(receiver)
+    assert len(calls) == 1
+    assert calls[0].queries == 1
+
+    settings.ORCA_SETTINGS = {"SLOW_CALL_THRESHOLD": 0}
+    with caplog.at_level(logging.WARNING, logger="django_orca.slow"):
+        user.has_role(CourseOwner, course)
+    assert "Slow orca call django_orca.auth.checkers.has_role" in caplog.text
+    assert "django_orca_userrole" in caplog.text
+
+
+@pytest.mark.django_db
+def test_profile_middleware(settings, caplog, client: Client, user: User, course):
+    settings.MIDDLEWARE = settings.MIDDLEWARE + [
+        "django_orca.middleware.OrcaProfileMiddleware"
+    ]
+    user.assign_role(CourseOwner, course)
+    client.force_login(user)
+    with caplog.at_level(logging.DEBUG, logger="django_orca.profile"):
+        client.get(course.get_absolute_url())
+    assert "django_orca.auth.checkers.has_permission called 2 times" in caplog.text
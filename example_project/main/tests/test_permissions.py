@@ -1,9 +1,22 @@
+import asyncio
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.contrib.auth.models import AnonymousUser
-from django_orca.shortcuts import has_permission, has_role
-
-from ..models import Course, User
-from ..roles import CourseOwner, CourseViewer
+from django.contrib.contenttypes.models import ContentType
+from django_orca.auth.backend import OrcaBackend
+from django_orca.shortcuts import (
+    aget_permissions_for_object,
+    aget_userroles,
+    ahas_permission,
+    ahas_role,
+    has_permission,
+    has_role,
+    prefetch_user_roles,
+)
+
+from ..models import Course, Department, User
+from ..roles import CourseOwner, CourseViewer, DepartmentOwner, SchoolOwner, Superuser
 
 
 @pytest.mark.django_db
@@ -49,3 +62,82 @@ def test_limited_permission_granting(user: User, course: Course):
     user.assign_role(CourseViewer, course)
     assert user.has_perm("main.view_course", course)
     assert not user.has_perm("main.change_course", course)
+
+
+@pytest.mark.django_db
+def test_prefetch_user_roles(user_factory, course_factory, django_assert_num_queries):
+    user: User = user_factory()
+    other: User = user_factory()
+    course1: Course = course_factory()
+    course2: Course = course_factory(department=course1.department)
+    course3: Course = course_factory()
+
+    user.assign_role(CourseViewer, course1)
+    user.assign_role(DepartmentOwner, course2.department)
+    user.assign_role(SchoolOwner, course3.department.school)
+    other.assign_role(CourseOwner, course3)
+
+    courses = list(prefetch_user_roles(Course.objects.order_by("pk"), user))
+    with django_assert_num_queries(0):
+        assert [has_role(user, CourseViewer, course) for course in courses] == [
+            True,
+            False,
+            False,
+        ]
+        assert [has_role(user, obj=course) for course in courses] == [
+            True,
+            False,
+            False,
+        ]
+        assert [user.has_perm("main.change_course", course) for course in courses] == [
+            True,
+            True,
+            True,
+        ]
+        assert [
+            has_permission(user, "main.delete_course", course) for course in courses
+        ] == [False, False, False]
+
+    # Another user's checks are not answered from the prefetched roles
+    with django_assert_num_queries(1):
+        assert has_permission(other, "main.delete_course", courses[2])
+
+
+@pytest.mark.django_db
+def test_async_api(user: User, course: Course):
+    backend = OrcaBackend()
+
+    @async_to_sync
+    async def check():
+        # Nothing may hit the database synchronously, even with a cold cache
+        ContentType.objects.clear_cache()
+        return await asyncio.gather(
+            ahas_role(user, CourseOwner, course),
+            ahas_permission(user, "main.change_course", course),
+            backend.ahas_perm(user, "main.view_course", course),
+            aget_permissions_for_object(user, course),
+        )
+
+    assert check() == [False, False, False, set()]
+
+    async_to_sync(user.aassign_role)(CourseOwner, course)
+    assert [ur.role_class for ur in async_to_sync(aget_userroles)(user)] == [
+        "courseowner"
+    ]
+    assert check() == [
+        True,
+        True,
+        True,
+        {"main.view_course", "main.change_course", "main.delete_course"},
+    ]
+
+    async_to_sync(user.aremove_role)(CourseOwner, course)
+    assert check() == [False, False, False, set()]
+
+
+@pytest.mark.django_db
+def test_role_models(honors_course):
+    assert CourseViewer.is_my_model(Course)
+    assert CourseViewer.is_my_model(honors_course)
+    assert not CourseViewer.is_my_model(Department)
+    assert Superuser.is_my_model(Department)
@@ -0,0 +1,279 @@
+"""
+Number of SQL queries of the public API, for every shape of data it handles.
+
+The counts are a contract: a change which adds a query to one of these paths
+has to update the expected number here. Where the number of queries must not
+depend on the number of users, objects or roles, the tests run with several
+sizes and assert that the count stays the same.
+"""
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django_orca.auth.backend import OrcaBackend
+from django_orca.registry import registry
+from django_orca.rest_framework.filters import ObjectRolePermissionsFilter
+from django_orca.shortcuts import (
+    ahas_permission,
+    annotate_permissions,
+    assign_role,
+    assign_roles,
+    get_objects,
+    get_permissions_for_object,
+    get_qs_for_user,
+    get_user_ids_with_permission,
+    get_user_roles_strings,
+    get_userroles,
+    get_users,
+    get_users_with_permission,
+    has_permission,
+    has_role,
+    iter_objects,
+    prefetch_user_roles,
+    remove_roles,
+    set_role_permission,
+)
+from django_orca.utils import get_from_cache, orca_cache
+
+from ..models import Course, Department, HonorsCourse, School
+from ..roles import CourseOwner, CourseViewer, DepartmentOwner, Superuser
+from ..views import CourseDetailView, CourseOwnerDetailView
+
+SIZES = [1, 5]
+
+
+@pytest.fixture(autouse=True)
+def warm_caches():
+    """
+    Start every test with the ContentTypes cached, as in a running process, and
+    the orca cache empty.
+    """
+    ContentType.objects.clear_cache()
+    ContentType.objects.get_for_models(Course, Department, HonorsCourse, School)
+    orca_cache().clear()
+    yield
+    orca_cache().clear()
+
+
+def count_queries(func, *args, **kwargs) -> int:
+    with CaptureQueriesContext(connection) as queries:
+        func(*args, **kwargs)
+    return len(queries)
+
+
+@pytest.fixture(params=["direct", "inherited", "mti", "all_models"])
+def shape(request, user, department, course_factory, honors_course_factory):
+    """
+    Return a user and the course they hold a role on, or are checked against,
+    for each way a role can apply to an object.
+    """
+    if request.param == "direct":
+        course = course_factory(department=department)
+        assign_role(user, CourseOwner, course)
+    elif request.param == "inherited":
+        course = course_factory(department=department)
+        assign_role(user, DepartmentOwner, department)
+    elif request.param == "mti":
+        course = honors_course_factory(department=department)
+        assign_role(user, CourseOwner, Course.objects.get(pk=course.pk))
+    else:
+        course = course_factory(department=department)
+        assign_role(user, Superuser)
+    return user, course
+
+
+@pytest.mark.django_db
+def test_has_permission(shape, django_assert_num_queries):
+    user, course = shape
+    with django_assert_num_queries(1):
+        has_permission(user, "main.change_course", course)
+    with django_assert_num_queries(1):
+        async_to_sync(ahas_permission)(user, "main.change_course", course)
+
+
+@pytest.mark.django_db
+def test_has_role(shape, django_assert_num_queries):
+    user, course = shape
+    with django_assert_num_queries(1):
+        has_role(user, obj=course)
+    with django_assert_num_queries(1):
+        has_role(user, CourseOwner, course)
+
+
+@pytest.mark.django_db
+def test_get_permissions_for_object(shape, django_assert_num_queries):
+    user, course = shape
+    with django_assert_num_queries(1):
+        get_permissions_for_object(user, course)
+
+
+@pytest.mark.django_db
+def test_get_users_with_permission(shape, django_assert_num_queries):
+    _, course = shape
+    with django_assert_num_queries(1):
+        list(get_users_with_permission("main.change_course", course))
+
+
+@pytest.mark.django_db
+def test_userroles(shape, django_assert_num_queries):
+    user, course = shape
+    with django_assert_num_queries(1):
+        list(get_userroles(user, obj=course))
+    with django_assert_num_queries(1):
+        get_user_roles_strings(user, course)
+    with django_assert_num_queries(1):
+        list(get_users(obj=course))
+
+
+@pytest.mark.django_db
+def test_backend(shape, django_assert_num_queries):
+    user, course = shape
+    backend = OrcaBackend()
+    with django_assert_num_queries(1):
+        backend.get_user_permissions(user, course)
+    with django_assert_num_queries(1):
+        backend.has_perm(user, "main.change_course", course)
+
+
+def setup_view(view_class, user, course):
+    request = RequestFactory().get("/")
+    request.user = user
+    view = view_class()
+    view.setup(request, pk=course.pk)
+    return view
+
+
+@pytest.mark.django_db
+def test_permission_view_mixin(request, shape, django_assert_num_queries):
+    user, course = shape
+    view = setup_view(CourseDetailView, user, course)
+
+    # The object, then one query per required permission. ModelBackend does not
+    # query for object permissions and the check stops at the first denial.
+    granted = request.node.callspec.params["shape"] != "all_models"
+    expected = 3 if granted else 2
+    with django_assert_num_queries(expected):
+        view.has_permission()
+
+
+@pytest.mark.django_db
+def test_role_view_mixin(shape, django_assert_num_queries):
+    user, course = shape
+    view = setup_view(CourseOwnerDetailView, user, course)
+
+    # The object, then the role.
+    with django_assert_num_queries(2):
+        view.has_permission()
+
+
+@pytest.mark.django_db
+def test_drf_filter(shape, django_assert_num_queries):
+    user, _ = shape
+    request = RequestFactory().get("/")
+    request.user = user
+    with django_assert_num_queries(1):
+        list(
+            ObjectRolePermissionsFilter().filter_queryset(
+                request, Course.objects.all(), None
+            )
+        )
+
+
+@pytest.fixture
+def make_courses(user, department, course_factory):
+    """
+    Create "n" courses, each with a role of "user" attached to it.
+    """
+
+    def make(n):
+        courses = [course_factory(department=department) for _ in range(n)]
+        for course in courses:
+            assign_role(user, CourseOwner, course)
+        return courses
+
+    return make
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("n", SIZES)
+def test_objects_queries(user, make_courses, n, django_assert_num_queries):
+    make_courses(n)
+    with django_assert_num_queries(2):
+        assert len(get_objects(user)) == n
+    with django_assert_num_queries(2):
+        assert len(list(iter_objects(user))) == n
+    with django_assert_num_queries(1):
+        assert len(get_qs_for_user(user, Course)) == n
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("n", SIZES)
+def test_prefetch_queries(user, make_courses, n, django_assert_num_queries):
+    make_courses(n)
+
+    # The courses, their departments and schools and the roles on each level.
+    with django_assert_num_queries(6):
+        courses = list(prefetch_user_roles(Course.objects.all(), user))
+    with django_assert_num_queries(0):
+        for course in courses:
+            assert has_permission(user, "main.change_course", course)
+            assert has_role(user, CourseOwner, course)
+
+    with django_assert_num_queries(1):
+        courses = list(
+            annotate_permissions(Course.objects.all(), user, ["main.change_course"])
+        )
+    assert all(course.can_change_course for course in courses)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("n", SIZES)
+def test_objects_permission_queries(
+    user_factory, department, course_factory, n, django_assert_num_queries
+):
+    courses = [course_factory(department=department) for _ in range(n)]
+    users = [user_factory() for _ in range(n)]
+    for course in courses:
+        assign_roles(users, CourseViewer, course)
+
+    with django_assert_num_queries(1):
+        result = get_user_ids_with_permission("main.view_course", courses)
+    assert len(result) == n
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("n", SIZES)
+def test_setters_queries(user_factory, course, n):
+    users = [user_factory() for _ in range(n)]
+
+    # Every assignment is a get_or_create of its own, followed by the insert of
+    # its RolePermission rows: the only path of the API linear in the users.
+    assert count_queries(assign_roles, users, CourseViewer, course) == 1 + 5 * n
+    assert count_queries(remove_roles, users, CourseViewer, course) == 3
+
+
+@pytest.mark.django_db
+def test_set_role_permission_queries(user, course, django_assert_num_queries):
+    assign_role(user, CourseViewer, course)
+    # The role assignment, the permission, then the update of its override.
+    with django_assert_num_queries(6):
+        set_role_permission(user, CourseViewer, "main.change_course", course)
+
+
+@pytest.mark.django_db
+def test_bitmask_cache_queries(settings, user, course, django_assert_num_queries):
+    settings.ORCA_SETTINGS = {"PERMISSION_STORAGE": "bitmask"}
+    assign_role(user, CourseOwner, course)
+    assign_role(user, CourseViewer, course)
+    orca_cache().clear()
+
+    # The roles, then the Permission ids of each role class, whatever the number
+    # of permissions they cover.
+    with django_assert_num_queries(3):
+        role_s, accesses = get_from_cache(user, course, any_object=False)
+    assert len(accesses) == len(registry.get_permission_ordinals(CourseOwner))
+    with django_assert_num_queries(0):
+        get_from_cache(user, course, any_object=False)
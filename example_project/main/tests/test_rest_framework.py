@@ -0,0 +1,195 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.test import RequestFactory
+from django_orca.loaders import get_permission_loader
+from django_orca.registry import registry
+from django_orca.rest_framework.filters import ObjectRolePermissionsFilter
+from rest_framework.test import APIClient
+
+from ..api import CourseViewSet
+from ..models import Course, Department, User
+from ..roles import CourseOwner, CourseViewer, DepartmentOwner
+
+
+class CompiledFilter(ObjectRolePermissionsFilter):
+    compiled_condition = True
+
+
+@pytest.fixture
+def api_client(user: User):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.mark.django_db
+def test_object_permissions(api_client: APIClient, user: User, course: Course):
+    url = f"/api/courses/{course.pk}/"
+    assert api_client.get(url).status_code == 404
+
+    user.assign_role(CourseViewer, course)
+    assert api_client.get(url).status_code == 200
+    assert [row["id"] for row in api_client.get("/api/courses/").json()] == [course.pk]
+    assert api_client.patch(url, {"name": "new"}).status_code == 403
+    assert api_client.delete(url).status_code == 403
+
+    user.assign_role(CourseOwner, course)
+    assert api_client.patch(url, {"name": "new"}).status_code == 200
+    assert api_client.delete(url).status_code == 204
+
+    assert APIClient().get("/api/courses/").status_code == 403
+
+
+@pytest.mark.django_db
+def test_object_permissions_create(
+    api_client: APIClient, user: User, course: Course, department: Department
+):
+    data = {"name": "new", "department": department.pk}
+
+    # Object roles do not grant the model-level "add" permission.
+    user.assign_role(CourseOwner, course)
+    assert api_client.post("/api/courses/", data).status_code == 403
+
+    user.user_permissions.add(Permission.objects.get(codename="add_course"))
+    user = User.objects.get(pk=user.pk)
+    api_client.force_authenticate(user)
+    assert api_client.post("/api/courses/", data).status_code == 201
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("filter_class", [ObjectRolePermissionsFilter, CompiledFilter])
+def test_object_permissions_superuser(
+    monkeypatch, filter_class, api_client: APIClient, user: User, course_factory
+):
+    monkeypatch.setattr(CourseViewSet, "filter_backends", [filter_class])
+    courses = [course_factory(), course_factory()]
+    user.is_superuser = True
+    user.save()
+
+    url = f"/api/courses/{courses[0].pk}/"
+    assert api_client.get(url).status_code == 200
+    assert {row["id"] for row in api_client.get("/api/courses/").json()} == {
+        course.pk for course in courses
+    }
+    assert api_client.patch(url, {"name": "new"}).status_code == 200
+    data = {"name": "new", "department": courses[0].department_id}
+    assert api_client.post("/api/courses/", data).status_code == 201
+
+    user.is_active = False
+    user.save()
+    assert api_client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_object_permissions_inherited(
+    api_client: APIClient, user: User, department: Department, course_factory
+):
+    course: Course = course_factory(department=department)
+    user.assign_role(DepartmentOwner, department)
+
+    url = f"/api/courses/{course.pk}/"
+    assert api_client.patch(url, {"name": "new"}).status_code == 200
+    assert api_client.delete(url).status_code == 403
+
+
+@pytest.mark.django_db
+def test_permission_loader(
+    user: User, department: Department, course_factory, django_assert_num_queries
+):
+    courses = [course_factory(department=department) for _ in range(5)]
+    user.assign_role(CourseOwner, courses[0])
+    user.assign_role(DepartmentOwner, department)
+
+    request = RequestFactory().get("/")
+    request.user = user
+    loader = get_permission_loader(request)
+    assert get_permission_loader(request) is loader
+
+    loader.prime(courses)
+    with django_assert_num_queries(1):
+        assert loader.load(courses[0]) == {
+            "main.view_course",
+            "main.change_course",
+            "main.delete_course",
+        }
+        for course in courses[1:]:
+            assert loader.load(course) == {"main.view_course", "main.change_course"}
+            assert not loader.has_perm(course, "main.delete_course")
+
+    with django_assert_num_queries(1):
+        assert loader.load(department) == {"main.view_department"}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("filter_class", [ObjectRolePermissionsFilter, CompiledFilter])
+def test_permissions_filter(
+    filter_class,
+    user: User,
+    department: Department,
+    course_factory,
+    django_assert_num_queries,
+):
+    course1: Course = course_factory(department=department, name="a")
+    course2: Course = course_factory(department=department, name="b")
+    course_factory(department=department)
+    user.assign_role(CourseViewer, course1)
+    user.assign_role(CourseViewer, course2)
+
+    request = RequestFactory().get("/")
+    request.user = user
+    view = CourseViewSet()
+    queryset = Course.objects.select_related("department").filter(name="a")
+
+    # The queryset of the view is narrowed down, not replaced.
+    with django_assert_num_queries(1):
+        courses = list(filter_class().filter_queryset(request, queryset, view))
+        assert courses == [course1]
+        assert courses[0].department == department
+
+    request.user = AnonymousUser()
+    assert not filter_class().filter_queryset(request, queryset, view).exists()
+
+
+@pytest.mark.django_db
+def test_permissions_filter_condition(user: User, course: Course):
+    condition = CompiledFilter().get_condition(Course.objects.all(), None)
+    assert registry.get_perm_condition(Course, "main.view_course") is condition
+
+    # The cached condition holds no database state, the queries are built when
+    # it is bound to a user.
+    assert "ContentType" not in repr(condition)
+    assert "QuerySet" not in repr(condition)
+    user.assign_role(CourseViewer, course)
+    ContentType.objects.clear_cache()
+    assert list(Course.objects.filter(condition.for_user(user))) == [course]
+
+    registry.clear_cache()
+    assert CompiledFilter().get_condition(Course.objects.all(), None) is not condition
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("n", [1, 5])
+def test_permissions_field(
+    api_client: APIClient,
+    user: User,
+    department: Department,
+    course_factory,
+    n,
+    django_assert_num_queries,
+):
+    courses = [course_factory(department=department) for _ in range(n)]
+    user.assign_role(DepartmentOwner, department)
+    user.assign_role(CourseOwner, courses[0])
+
+    # The courses, then the permissions of all of them.
+    with django_assert_num_queries(2):
+        rows = api_client.get("/api/courses/").json()
+
+    permissions = {row["id"]: row["permissions"] for row in rows}
+    assert permissions[courses[0].pk] == ["change", "delete", "view"]
+    for course in courses[1:]:
+        assert permissions[course.pk] == ["change", "view"]
+
+    response = api_client.get(f"/api/courses/{courses[0].pk}/")
+    assert response.json()["permissions"] == ["change", "delete", "view"]
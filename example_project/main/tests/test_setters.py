@@ -1,6 +1,20 @@
 import pytest
+from django_orca.auth.getters import get_perm_qs_for_user
 from django_orca.exceptions import InvalidRoleAssignment
-from django_orca.shortcuts import assign_role, get_userroles, remove_role
+from django_orca.loaders import PermissionLoader
+from django_orca.shortcuts import (
+    annotate_permissions,
+    assign_role,
+    get_permissions_for_object,
+    get_permissions_for_objects,
+    get_user_ids_with_permission,
+    get_userroles,
+    get_users_with_permission,
+    has_permission,
+    prefetch_user_roles,
+    remove_role,
+    set_role_permission,
+)
 
 from ..models import Course, User
 from ..roles import CourseOwner, CourseViewer, Superuser
@@ -49,3 +63,57 @@ def test_assign_roles(user, course):
 
     with pytest.raises(InvalidRoleAssignment):
         assign_role(user, Superuser, course)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "orca_settings",
+    [
+        {"PERMISSION_STORAGE": "rows", "CHECK_OVERRIDES": True},
+        {"PERMISSION_STORAGE": "virtual"},
+        {"PERMISSION_STORAGE": "bitmask"},
+    ],
+    ids=["rows", "virtual", "bitmask"],
+)
+def test_set_role_permission_checks(
+    settings, orca_settings, user: User, course: Course
+):
+    settings.ORCA_SETTINGS = orca_settings
+    assign_role(user, CourseViewer, course)
+    set_role_permission(user, CourseViewer, "main.view_course", course, access=False)
+    set_role_permission(user, CourseViewer, "main.change_course", course)
+
+    granted = {"main.change_course"}
+    assert get_permissions_for_object(user, course) == granted
+    assert get_permissions_for_objects(user, [course]) == {course.pk: granted}
+    assert PermissionLoader(user).load(course) == granted
+
+    for perm, access in [("main.view_course", False), ("main.change_course", True)]:
+        assert user.has_perm(perm, course) is access
+        assert has_permission(user, perm, course) is access
+        assert (course in get_perm_qs_for_user(user, Course, perm)) is access
+        assert (user in get_users_with_permission(perm, course)) is access
+        assert (course.pk in get_user_ids_with_permission(perm, [course])) is access
+
+        (prefetched,) = prefetch_user_roles(Course.objects.all(), user)
+        assert has_permission(user, perm, prefetched) is access
+
+        (annotated,) = annotate_permissions(Course.objects.all(), user, [perm])
+        assert getattr(annotated, f"can_{perm.split('.')[1]}") is access
+
+
+@pytest.mark.django_db
+def test_role_definition_checks(monkeypatch, user: User, course: Course):
+    assign_role(user, CourseViewer, course)
+
+    # In rows storage, the checks follow the role definition rather than the
+    # stored rows, which are stale until "orca_sync_permissions" runs.
+    monkeypatch.setattr(
+        CourseViewer, "allow", ["main.view_course", "main.change_course"]
+    )
+    assert has_permission(user, "main.change_course", course)
+    assert course in get_perm_qs_for_user(user, Course, "main.change_course")
+    assert get_permissions_for_object(user, course) == {
+        "main.view_course",
+        "main.change_course",
+    }
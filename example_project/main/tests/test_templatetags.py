@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.template import Context, RequestContext, Template
+from django.test import RequestFactory
+
+from ..models import Course, Department, User
+from ..roles import CourseOwner, DepartmentOwner
+
+
+def render(source, user, **context):
+    request = RequestFactory().get("/")
+    request.user = user
+    return Template("{% load orca %}" + source).render(RequestContext(request, context))
+
+
+@pytest.fixture
+def courses(user: User, department: Department, course_factory):
+    courses = [course_factory(department=department) for _ in range(5)]
+    user.assign_role(CourseOwner, courses[0])
+    return courses
+
+
+LOOP = (
+    "{% for course in object_list %}"
+    '{% has_perm "main.delete_course" course as can_delete %}'
+    "{{ can_delete|yesno:'y,n' }}"
+    "{% endfor %}"
+)
+
+
+@pytest.mark.django_db
+def test_has_perm(user: User, courses, django_assert_num_queries):
+    # The objects of the list view are resolved together.
+    with django_assert_num_queries(1):
+        assert render(LOOP, user, object_list=courses) == "ynnnn"
+
+    source = (
+        "{% prime_permissions courses %}"
+        "{% for course in courses %}"
+        '{% has_perm "main.change_course" course as can_edit %}'
+        "{{ can_edit|yesno:'y,n' }}"
+        "{% endfor %}"
+    )
+    with django_assert_num_queries(1):
+        assert render(source, user, courses=courses) == "ynnnn"
+
+    assert render(LOOP, AnonymousUser(), object_list=courses) == "nnnnn"
+
+
+@pytest.mark.django_db
+def test_has_perm_without_request(user: User, courses, django_assert_num_queries):
+    template = Template("{% load orca %}" + LOOP)
+    with django_assert_num_queries(1):
+        output = template.render(Context({"user": user, "object_list": courses}))
+    assert output == "ynnnn"
+
+
+@pytest.mark.django_db
+def test_user_permissions(user: User, course: Course, department: Department):
+    source = (
+        '{% if "main.change_course" in course|user_permissions:request %}'
+        "y{% else %}n{% endif %}"
+    )
+    assert render(source, user, course=course) == "n"
+
+    user.assign_role(DepartmentOwner, course.department)
+    assert render(source, user, course=course) == "y"
+
+    template = Template(
+        '{% load orca %}{% if "main.change_course" in course|user_permissions:user %}'
+        "y{% else %}n{% endif %}"
+    )
+    assert template.render(Context({"user": user, "course": course})) == "y"
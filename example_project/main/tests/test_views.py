@@ -1,9 +1,21 @@
 import pytest
-from django.test import Client
+from asgiref.sync import async_to_sync
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.test import AsyncClient, Client, RequestFactory
 from django.urls import reverse
+from django.views.generic.base import View
+from django_orca.utils import orca_cache
+from django_orca.views import ObjectPermissionRequiredMixin
 
 from ..models import Course, Department, User
-from ..roles import CourseOwner, DepartmentOwner
+from ..roles import CourseOwner, CourseViewer, DepartmentOwner
+from ..views import (
+    CourseDetailView,
+    CourseFusedDetailView,
+    CourseKeysetListView,
+    CourseListView,
+)
 
 
 @pytest.mark.django_db
@@ -71,3 +83,137 @@ def test_perm_view_department(client: Client, user: User, department_factory):
     user.assign_role(DepartmentOwner, department)
     response = client.get(url)
     assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_async_views(async_client: AsyncClient, user: User, course: Course):
+    perm_url = reverse("async-course-detail", kwargs={"pk": course.pk})
+    role_url = reverse("async-course-owner-detail", kwargs={"pk": course.pk})
+
+    @async_to_sync
+    async def get(url):
+        await async_client.aforce_login(user)
+        return await async_client.get(url)
+
+    assert get(perm_url).status_code == 403
+    assert get(role_url).status_code == 403
+
+    user.assign_role(CourseOwner, course)
+    response = get(perm_url)
+    assert response.status_code == 200
+    assert response.content == course.name.encode()
+    assert get(role_url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_perm_view_fused(client: Client, user: User, course: Course):
+    client.force_login(user)
+
+    url = reverse("course-detail-fused", kwargs={"pk": course.pk})
+    assert client.get(url).status_code == 403
+    assert (
+        client.get(reverse("course-detail-fused", kwargs={"pk": 0})).status_code == 404
+    )
+
+    user.assign_role(CourseViewer, course)
+    assert client.get(url).status_code == 403
+
+    user.assign_role(CourseOwner, course)
+    assert client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "view_class, expected", [(CourseDetailView, 3), (CourseFusedDetailView, 1)]
+)
+def test_perm_view_queries(
+    view_class, expected, user: User, course: Course, django_assert_num_queries
+):
+    user.assign_role(CourseOwner, course)
+    request = RequestFactory().get("/")
+    request.user = user
+
+    # The object is fetched once, whether for the check or for the page.
+    with django_assert_num_queries(expected):
+        response = view_class.as_view()(request, pk=course.pk)
+        assert response.context_data["object"] == course
+
+
+@pytest.mark.django_db
+def test_perm_list_view(
+    client: Client, user: User, department, course_factory, django_assert_num_queries
+):
+    orca_cache().clear()
+    courses = [course_factory(department=department) for _ in range(5)]
+    course_factory()
+    user.assign_role(DepartmentOwner, department)
+    client.force_login(user)
+
+    response = client.get(reverse("course-list"))
+    assert response.status_code == 200
+    assert list(response.context["object_list"]) == courses
+    assert response.context["paginator"].count == 5
+
+    request = RequestFactory().get("/")
+    request.user = user
+
+    # The count is cached per user and permissions.
+    with django_assert_num_queries(1):
+        response = CourseListView.as_view(paginate_by=2)(request)
+        assert list(response.context_data["object_list"]) == courses[:2]
+        assert response.context_data["paginator"].num_pages == 3
+
+
+@pytest.mark.django_db
+def test_perm_list_view_keyset(
+    user: User, department, course_factory, django_assert_num_queries
+):
+    courses = [course_factory(department=department) for _ in range(5)]
+    course_factory()
+    user.assign_role(DepartmentOwner, department)
+    view = CourseKeysetListView.as_view(paginate_by=2)
+
+    pages = []
+    cursor = ""
+    while cursor is not None:
+        request = RequestFactory().get("/", {"after": cursor})
+        request.user = user
+        with django_assert_num_queries(1):
+            context = view(request).context_data
+        pages.append(context["object_list"])
+        # The last page is still a page of a paginated list
+        assert context["is_paginated"]
+        cursor = context["next_cursor"]
+    assert pages == [courses[:2], courses[2:4], courses[4:]]
+
+    request = RequestFactory().get("/")
+    request.user = user
+    context = CourseKeysetListView.as_view(paginate_by=5)(request).context_data
+    assert not context["is_paginated"]
+
+    request = RequestFactory().get("/", {"after": "nope"})
+    request.user = user
+    with pytest.raises(Http404):
+        view(request)
+
+
+class CourseNameView(ObjectPermissionRequiredMixin, View):
+    permission_required = "main.view_course"
+
+    def get_object(self):
+        return Course.objects.get(pk=self.kwargs["pk"])
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(self.get_object().name)
+
+
+@pytest.mark.django_db
+def test_perm_view_own_get_object(user: User, course: Course):
+    request = RequestFactory().get("/")
+    request.user = user
+    with pytest.raises(PermissionDenied):
+        CourseNameView.as_view()(request, pk=course.pk)
+
+    user.assign_role(CourseViewer, course)
+    response = CourseNameView.as_view()(request, pk=course.pk)
+    assert response.content == course.name.encode()
@@ -1,8 +1,17 @@
 from typing import Any, Dict
 
-from django.views.generic.base import TemplateView
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.generic.base import TemplateView, View
 from django.views.generic.detail import DetailView
-from django_orca.views import ObjectPermissionRequiredMixin, ObjectRoleRequiredMixin
+from django.views.generic.list import ListView
+from django_orca.views import (
+    AsyncObjectPermissionRequiredMixin,
+    AsyncObjectRoleRequiredMixin,
+    ObjectPermissionListMixin,
+    ObjectPermissionRequiredMixin,
+    ObjectRoleRequiredMixin,
+)
 
 from .models import Course, Department
 from .roles import CourseOwner
@@ -28,6 +37,22 @@ class CourseDetailView(ObjectPermissionRequiredMixin, DetailView):
     permission_required = ["main.view_course", "main.change_course"]
 
 
+class CourseFusedDetailView(CourseDetailView):
+    fuse_permission_check = True
+
+
+class CourseListView(ObjectPermissionListMixin, ListView):
+    model = Course
+    ordering = "pk"
+    paginate_by = 20
+    permission_required = "main.view_course"
+    count_strategy = "cached"
+
+
+class CourseKeysetListView(CourseListView):
+    keyset_field = "pk"
+
+
 class CourseOwnerDetailView(ObjectRoleRequiredMixin, DetailView):
     model = Course
     role_required = CourseOwner
@@ -43,3 +68,20 @@ class CourseOwnerDetailView404(ObjectRoleRequiredMixin, DetailView):
     model = Course
     return_404 = True
     role_required = CourseOwner
+
+
+class AsyncCourseView(View):
+    async def aget_object(self):
+        self.object = await aget_object_or_404(Course, pk=self.kwargs["pk"])
+        return self.object
+
+    async def get(self, request, *args, **kwargs):
+        return HttpResponse(self.object.name)
+
+
+class AsyncCourseDetailView(AsyncObjectPermissionRequiredMixin, AsyncCourseView):
+    permission_required = ["main.view_course", "main.change_course"]
+
+
+class AsyncCourseOwnerDetailView(AsyncObjectRoleRequiredMixin, AsyncCourseView):
+    role_required = CourseOwner
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django_extensions",
     "django_migration_linter",
     "heavy_water",
+    "rest_framework",
     "django_orca",
     "example_project.main",
 ]
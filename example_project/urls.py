@@ -1,19 +1,37 @@
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
 
+from example_project.main.api import CourseViewSet
 from example_project.main.views import (
+    AsyncCourseDetailView,
+    AsyncCourseOwnerDetailView,
     CourseDetailView,
     CourseDetailView404,
+    CourseFusedDetailView,
+    CourseKeysetListView,
+    CourseListView,
     CourseOwnerDetailView,
     CourseOwnerDetailView404,
     DepartmentDetailView,
     IndexView,
 )
 
+router = DefaultRouter()
+router.register("courses", CourseViewSet)
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/", include(router.urls)),
+    path("course/", CourseListView.as_view(), name="course-list"),
+    path("course/keyset/", CourseKeysetListView.as_view(), name="course-keyset-list"),
     path("course/<int:pk>", CourseDetailView.as_view(), name="course-detail"),
     path("course404/<int:pk>", CourseDetailView404.as_view(), name="course-detail-404"),
+    path(
+        "course-fused/<int:pk>",
+        CourseFusedDetailView.as_view(),
+        name="course-detail-fused",
+    ),
     path(
         "department/<int:pk>", DepartmentDetailView.as_view(), name="department-detail"
     ),
@@ -27,5 +45,15 @@ urlpatterns = [
         CourseOwnerDetailView404.as_view(),
         name="course-owner-detail-404",
     ),
+    path(
+        "async/course/<int:pk>",
+        AsyncCourseDetailView.as_view(),
+        name="async-course-detail",
+    ),
+    path(
+        "async/course-owner/<int:pk>",
+        AsyncCourseOwnerDetailView.as_view(),
+        name="async-course-owner-detail",
+    ),
     path("", IndexView.as_view(), name="index"),
 ]
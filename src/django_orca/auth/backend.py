@@ -1,16 +1,36 @@
 from typing import Set
 
 from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
 
-from django_orca.models import RolePermission
+from django_orca.instrumentation import instrument
+from django_orca.models import RolePermission, UserRole
+from django_orca.utils import (
+    PERMISSION_STORAGE_BITMASK,
+    PERMISSION_STORAGE_VIRTUAL,
+    get_mask_accesses,
+    get_permission_storage,
+    get_role_accesses,
+    get_roleclass,
+)
 
-from .checkers import has_permission
+from .checkers import ahas_permission, has_permission
 
 
 class OrcaBackend(BaseBackend):
+    @instrument
     def get_user_permissions(self, user_obj, obj=None) -> Set:
-        query = RolePermission.objects.filter(role__user=user_obj)
+        storage = get_permission_storage()
+        if storage == PERMISSION_STORAGE_VIRTUAL:
+            return self.get_virtual_permissions(user_obj, obj=obj)
+        elif storage == PERMISSION_STORAGE_BITMASK:
+            return self.get_mask_permissions(user_obj, obj=obj)
+
+        query = RolePermission.objects.filter(role__user=user_obj).select_related(
+            "permission"
+        )
         if obj:
             ct_obj = ContentType.objects.get_for_model(obj)
             query = query.filter(role__content_type=ct_obj.id, role__object_id=obj.id)
@@ -18,6 +38,51 @@ class OrcaBackend(BaseBackend):
         allows = set([rp.permission for rp in query if rp.access])
         return allows.difference([rp.permission for rp in query if not rp.access])
 
+    def get_virtual_permissions(self, user_obj, obj=None) -> Set:
+        """
+        Compute the permissions from the role class definitions, applying the
+        per-instance overrides stored as RolePermission rows.
+        """
+        query = UserRole.objects.filter(user=user_obj)
+        if obj:
+            ct_obj = ContentType.objects.get_for_model(obj)
+            query = query.filter(content_type=ct_obj.id, object_id=obj.id)
+
+        roles = dict()
+        for role_id, role_s, perm_id, access in query.values_list(
+            "id", "role_class", "accesses__permission", "accesses__access"
+        ):
+            _, overrides = roles.setdefault(role_id, (role_s, []))
+            if perm_id:
+                overrides.append((perm_id, access))
+
+        allows, denies = set(), set()
+        for role_s, overrides in roles.values():
+            for perm_id, access in get_role_accesses(role_s, overrides):
+                (allows if access else denies).add(perm_id)
+
+        return set(Permission.objects.filter(id__in=allows.difference(denies)))
+
+    def get_mask_permissions(self, user_obj, obj=None) -> Set:
+        """
+        Decode the permissions from the permission masks of the role assignments.
+        """
+        query = UserRole.objects.filter(user=user_obj)
+        if obj:
+            ct_obj = ContentType.objects.get_for_model(obj)
+            query = query.filter(content_type=ct_obj.id, object_id=obj.id)
+
+        allows, denies = set(), set()
+        for role_s, mask in query.values_list("role_class", "permission_mask"):
+            for perm_s, access in get_mask_accesses(get_roleclass(role_s), mask):
+                (allows if access else denies).add(perm_s)
+
+        condition = Q(pk__in=[])
+        for perm_s in allows.difference(denies):
+            app_label, codename = perm_s.split(".")
+            condition |= Q(content_type__app_label=app_label, codename=codename)
+        return set(Permission.objects.filter(condition))
+
     def get_all_permissions(self, user_obj, obj=None):
         return {
             *self.get_user_permissions(user_obj, obj=obj),
@@ -26,3 +91,6 @@ class OrcaBackend(BaseBackend):
 
     def has_perm(self, user_obj, perm, obj=None) -> bool:
         return has_permission(user_obj, perm, obj=obj)
+
+    async def ahas_perm(self, user_obj, perm, obj=None) -> bool:
+        return await ahas_permission(user_obj, perm, obj=obj)
@@ -2,12 +2,21 @@ from typing import Optional, Type
 
 from django.contrib.auth.models import AnonymousUser
 
-from django_orca.auth.getters import get_perm_qs_for_user, get_userroles
+from django_orca.auth.getters import (
+    get_perm_qs_for_user,
+    get_prefetched_permission,
+    get_prefetched_userroles,
+    get_userroles,
+)
+from django_orca.instrumentation import instrument
+from django_orca.registry import registry
 from django_orca.roles import Role
+from django_orca.utils import aensure_content_types, check_my_model, get_roleclass
 
 RoleQ = Optional[Type[Role]]
 
 
+@instrument
 def has_role(user, role_class: RoleQ = None, obj=None) -> bool:
     """
     Check if the "user" has any role attached to them.
@@ -17,10 +26,39 @@ def has_role(user, role_class: RoleQ = None, obj=None) -> bool:
     """
     if isinstance(user, AnonymousUser):
         return False
-    else:
+
+    userroles = get_prefetched_userroles(user, obj) if obj is not None else None
+    if userroles is None:
         return get_userroles(user, role_class=role_class, obj=obj).exists()
 
+    return _has_prefetched_role(userroles, role_class, obj)
+
+
+async def ahas_role(user, role_class: RoleQ = None, obj=None) -> bool:
+    """
+    Async version of "has_role".
+    """
+    if isinstance(user, AnonymousUser):
+        return False
+
+    userroles = get_prefetched_userroles(user, obj) if obj is not None else None
+    if userroles is None:
+        if obj is not None:
+            await aensure_content_types(obj._meta.model)
+        return await get_userroles(user, role_class=role_class, obj=obj).aexists()
 
+    return _has_prefetched_role(userroles, role_class, obj)
+
+
+def _has_prefetched_role(userroles, role_class: RoleQ, obj) -> bool:
+    if role_class:
+        role = get_roleclass(role_class)
+        check_my_model(role, obj)
+        return any(ur.role_class == role.get_class_name() for ur in userroles)
+    return bool(userroles)
+
+
+@instrument
 def has_permission(user, permission, obj=None, any_object=False) -> bool:
     """
     Return True if the "user" has the "permission".
@@ -35,8 +73,38 @@ def has_permission(user, permission, obj=None, any_object=False) -> bool:
     if obj is None:
         return False
 
+    prefetched = get_prefetched_permission(user, obj, permission)
+    if prefetched is not None:
+        return prefetched
+
     return (
         get_perm_qs_for_user(user, obj._meta.model, permission)
         .filter(id=obj.id)
         .exists()
     )
+
+
+async def ahas_permission(user, permission, obj=None, any_object=False) -> bool:
+    """
+    Async version of "has_permission".
+    """
+    if isinstance(user, AnonymousUser):
+        return False
+
+    # We do not support any_object yet
+    if any_object:
+        raise NotImplementedError("We do not support any_object yet")
+
+    if obj is None:
+        return False
+
+    prefetched = get_prefetched_permission(user, obj, permission)
+    if prefetched is not None:
+        return prefetched
+
+    model = obj._meta.model
+    branches = registry.get_permission_branches(model, permission)
+    await aensure_content_types(*[branch.model for branch in branches])
+    return (
+        await get_perm_qs_for_user(user, model, permission).filter(id=obj.id).aexists()
+    )
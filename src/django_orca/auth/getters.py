@@ -1,22 +1,56 @@
 from itertools import groupby
-from typing import Any, Iterable, List, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import AbstractBaseUser
+from django.contrib.auth.models import AbstractBaseUser, AnonymousUser
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
-
-from django_orca.registry import registry
+from django.db import connections, models
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.lookups import Exact
+
+from django_orca.instrumentation import instrument
+from django_orca.registry import (
+    BRANCH_DIRECT,
+    BRANCH_INHERITED,
+    BRANCH_PARENT,
+    PermissionBranch,
+    registry,
+)
 from django_orca.roles import Role
 
-from ..models import UserRole
-from ..utils import check_my_model, get_roleclass
+from ..models import RolePermission, UserRole
+from ..utils import (
+    PERMISSION_STORAGE_BITMASK,
+    aensure_content_types,
+    check_my_model,
+    get_check_overrides,
+    get_mask_accesses,
+    get_permission_storage,
+    get_roleclass,
+    permission_to_string,
+)
 
 RoleQ = Optional[Type[Role]]
 ModelQ = Optional[Type[models.Model]]
 T = TypeVar("T", bound=models.Model)
 T2 = TypeVar("T2", bound=models.Model)
 
+DEFAULT_CHUNK_SIZE = 2000
+
 
 def get_users(
     role_class: RoleQ = None, obj: Any = None
@@ -32,22 +66,27 @@ def get_users(
     if role_class:
         # All users who have "role_class" attached to any object.
         role = get_roleclass(role_class)
-        kwargs["roles__role_class"] = role.get_class_name()
+        kwargs["role_class"] = role.get_class_name()
 
     if obj:
         # All users who have any role attached to the object.
         ct_obj = ContentType.objects.get_for_model(obj)
-        kwargs["roles__content_type"] = ct_obj.id
-        kwargs["roles__object_id"] = obj.id
+        kwargs["content_type"] = ct_obj.id
+        kwargs["object_id"] = obj.id
 
     # Check if object belongs
     # to the role class.
     check_my_model(role, obj)
 
-    # Return as a distinct QuerySet.
-    return get_user_model().objects.filter(**kwargs).distinct()
+    query = get_user_model().objects.all()
+    if kwargs:
+        # A semi-join returns every user once, without a DISTINCT.
+        roles = UserRole.objects.filter(user=models.OuterRef("pk"), **kwargs)
+        query = query.filter(models.Exists(roles))
+    return query
 
 
+@instrument
 def get_objects(user, role_class: RoleQ = None, model=None) -> List[Any]:
     """
     Return the list of objects attached to a given user.
@@ -55,96 +94,660 @@ def get_objects(user, role_class: RoleQ = None, model=None) -> List[Any]:
     If "model" is provided, only the objects of that model will be returned.
     """
     if model:
-        return list(get_qs_for_user(user, model=model, role_class=role_class))
-    else:
-        query = get_userroles(user, role_class=role_class, model_class=model).values(
-            "content_type", "object_id"
+        return list(
+            get_qs_for_user(user, model=model, role_class=role_class, inherit=False)
         )
+    else:
+        query = _get_object_keys(user, role_class)
 
         objs: List[models.Model] = []
-        for content_type_id, group in groupby(query, lambda obj: obj["content_type"]):
-            content_type = ContentType.objects.get_for_id(content_type_id)
-            ids = [obj["object_id"] for obj in group]
-            objs.extend(content_type.model_class().objects.filter(id__in=ids))
+        for content_type_id, group in groupby(query, lambda item: item[0]):
+            objs.extend(_get_objects_in_bulk(content_type_id, [i for _, i in group]))
 
         return objs
 
 
+def iter_objects(
+    user, role_class: RoleQ = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """
+    Yield the objects attached to a given user, like "get_objects", holding at most "chunk_size" of them in memory.
+    """
+    query = _get_object_keys(user, role_class).iterator(chunk_size)
+
+    for content_type_id, group in groupby(query, lambda item: item[0]):
+        ids: List[int] = []
+        for _, object_id in group:
+            ids.append(object_id)
+            if len(ids) == chunk_size:
+                yield from _get_objects_in_bulk(content_type_id, ids)
+                ids = []
+        if ids:
+            yield from _get_objects_in_bulk(content_type_id, ids)
+
+
+def _get_object_keys(user, role_class: RoleQ = None):
+    # Ordering by content type guarantees a single group per model
+    return (
+        get_userroles(user, role_class=role_class)
+        .filter(content_type__isnull=False)
+        .order_by("content_type", "object_id")
+        .values_list("content_type", "object_id")
+        .distinct()
+    )
+
+
+def _get_objects_in_bulk(content_type_id, ids: List[int]) -> List[models.Model]:
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    objs = model._default_manager.in_bulk(ids)
+    return [objs[object_id] for object_id in ids if object_id in objs]
+
+
 def get_qs_for_user(
-    user, model: Type[T], role_class: RoleQ = None
+    user, model: Type[T], role_class: RoleQ = None, inherit: bool = True
 ) -> models.QuerySet[T]:
-    # TODO: Include permission inheritance
+    """
+    Return a QuerySet of the objects of "model" a role of "user" is attached to.
+    If "inherit" is True, the objects whose permission parents have a role of "user" granting inherited permissions are returned as well.
+    If "role_class" is provided, only the roles of that role class are considered.
+    """
+    userroles = UserRole.objects.filter(user=user)
+    role_names = None
+    if role_class:
+        role_names = [get_roleclass(role_class).get_class_name()]
+        userroles = userroles.filter(role_class__in=role_names)
+
     ct_obj = ContentType.objects.get_for_model(model)
-    role_query = UserRole.objects.filter(user=user, content_type=ct_obj.id)
+    local_role_qs = userroles.filter(content_type=ct_obj.id)
+    condition = models.Q(pk__in=models.Subquery(local_role_qs.values("object_id")))
+
+    if inherit:
+        for path, parent in registry.get_perm_inheritance_tree(model).items():
+            parent_roles = [
+                role.get_class_name()
+                for role in registry.roles_map.values()
+                if not role.all_models and role.inherit_allow and parent in role.models
+            ]
+            if role_names is not None:
+                parent_roles = [name for name in parent_roles if name in role_names]
+            if not parent_roles:
+                continue
+
+            ct_parent = ContentType.objects.get_for_model(parent)
+            parent_role_qs = userroles.filter(
+                content_type=ct_parent.id, role_class__in=parent_roles
+            )
+            condition |= models.Q(
+                **{f"{path}__in": models.Subquery(parent_role_qs.values("object_id"))}
+            )
+
+    return model.objects.filter(condition)
+
+
+def get_branch_condition(
+    branch: PermissionBranch, permission: Optional[str] = None
+) -> models.Q:
+    """
+    Return the condition matching the UserRoles granting permissions through "branch".
+    If "permission" is provided, only the UserRoles granting it are matched, once the overrides of "set_role_permission" are applied when they are checked.
+    """
+    condition = models.Q(
+        content_type=ContentType.objects.get_for_model(branch.model),
+        role_class__in=[role.get_class_name() for role in branch.roles],
+    )
+    if (
+        permission is None
+        or branch.kind == BRANCH_INHERITED
+        or not get_check_overrides()
+    ):
+        # The roles of the branch grant "permission" by their definition.
+        return condition
+    return condition & _get_override_condition(branch, permission)
+
+
+def _get_override_condition(branch: PermissionBranch, permission: str) -> models.Q:
+    # The roles of "branch" whose assignment grants "permission": through the
+    # bits of the permission masks in bitmask storage, else through the role
+    # definition unless an override row denies it, or an override row allowing it.
+    if get_permission_storage() == PERMISSION_STORAGE_BITMASK:
+        condition = models.Q(pk__in=[])
+        for role in branch.roles:
+            ordinals = registry.get_permission_ordinals(role)
+            if permission in ordinals:
+                bit = 1 << ordinals[permission]
+                condition |= models.Q(role_class=role.get_class_name()) & Exact(
+                    models.F("permission_mask").bitand(bit), bit
+                )
+            elif permission in role.allow:
+                condition |= models.Q(role_class=role.get_class_name())
+        return condition
+
+    app_label, codename = permission.split(".")
+    accesses = RolePermission.objects.filter(
+        role=models.OuterRef("pk"),
+        permission__content_type__app_label=app_label,
+        permission__codename=codename,
+    )
+    granting = [
+        role.get_class_name() for role in branch.roles if permission in role.allow
+    ]
+    return (
+        models.Q(role_class__in=granting)
+        & ~models.Exists(accesses.filter(access=False))
+    ) | models.Exists(accesses.filter(access=True))
 
-    if role_class:
-        role_name = get_roleclass(role_class).get_class_name()
-        role_query = role_query.filter(role_class=role_name)
 
-    qs = model.objects.filter(id__in=models.Subquery(role_query.values("object_id")))
-    return qs
+def get_override_fields() -> Tuple[str, ...]:
+    """
+    Return the UserRole fields holding the overrides of "set_role_permission", read back by "get_overrides".
+    Outside of bitmask storage, they span the stored RolePermission rows: a UserRole comes once per row.
+    There are none when the overrides are not checked.
+    """
+    if not get_check_overrides():
+        return ()
+    if get_permission_storage() == PERMISSION_STORAGE_BITMASK:
+        return ("permission_mask",)
+    return (
+        "accesses__permission__content_type__app_label",
+        "accesses__permission__codename",
+        "accesses__access",
+    )
 
 
-def get_objects_for_role(
-    model: Type[T],
-    role_class: Type[Role],
-    permission: str,
-    userrole_qs,
-    parent_model: Optional[T] = None,
+def get_overrides(role_s: str, values: Sequence[Any]) -> List[Tuple[str, bool]]:
+    """
+    Return the (permission string, access) overrides of a UserRole of "role_s" from the "values" of the fields of "get_override_fields".
+    """
+    if not values:
+        return []
+    if get_permission_storage() == PERMISSION_STORAGE_BITMASK:
+        (mask,) = values
+        return get_mask_accesses(registry.roles_map[role_s], mask)
+
+    app_label, codename, access = values
+    if app_label is None:
+        return []
+    return [("%s.%s" % (app_label, codename), access)]
+
+
+def get_userrole_overrides(userrole: UserRole) -> List[Tuple[str, bool]]:
+    """
+    Return the (permission string, access) overrides of "userrole", from its prefetched "accesses" outside of bitmask storage.
+    """
+    if not get_check_overrides():
+        return []
+    if get_permission_storage() == PERMISSION_STORAGE_BITMASK:
+        return get_mask_accesses(userrole.role, userrole.permission_mask)
+    return [
+        (permission_to_string(access.permission), access.access)
+        for access in userrole.accesses.all()
+    ]
+
+
+def get_branch_userroles(userroles, branch: PermissionBranch, permission=None):
+    """
+    Narrow "userroles" down to the roles granting permissions, or "permission" if provided, through "branch".
+    """
+    return userroles.filter(get_branch_condition(branch, permission))
+
+
+class PermissionCondition(NamedTuple):
+    """
+    The part of the condition matching the objects on which a user has a permission which does not depend on the user: the permission and the branches granting it.
+    It is built by "compile_perm_condition" and bound to a user by "for_user". It only holds plain data: the queries are built on every call, so no ContentType instance or QuerySet outlives them.
+    """
+
+    permission: str
+    branches: Tuple[PermissionBranch, ...]
+
+    def for_user(self, user) -> models.Q:
+        if not self.branches:
+            return models.Q(pk__in=[])
+
+        userroles = UserRole.objects.filter(user=user)
+        condition = models.Q()
+        for branch in self.branches:
+            local_role_qs = get_branch_userroles(userroles, branch, self.permission)
+            object_ids = models.Subquery(local_role_qs.values("object_id"))
+            condition |= models.Q(**{f"{branch.path}__in": object_ids})
+        return condition
+
+
+def compile_perm_condition(
+    model: Type[models.Model], permission: str
+) -> PermissionCondition:
+    """
+    Return the PermissionCondition of "permission" on the objects of "model".
+    """
+    return PermissionCondition(
+        permission, tuple(registry.get_permission_branches(model, permission))
+    )
+
+
+def get_perm_qs_for_user(user, model: Type[T], permission: str) -> models.QuerySet[T]:
+    condition = compile_perm_condition(model, permission)
+    if not condition.branches:
+        return model.objects.none()
+
+    return model.objects.filter(condition.for_user(user))
+
+
+def filter_perm_qs_for_user(
+    qs: models.QuerySet[T], user, permission: str
+) -> models.QuerySet[T]:
+    """
+    Narrow "qs" down to the objects on which "user" has "permission", keeping its filters, ordering and related lookups.
+    """
+    if isinstance(user, AnonymousUser):
+        return qs.none()
+    return qs.filter(compile_perm_condition(qs.model, permission).for_user(user))
+
+
+def get_branch_filter(userroles, branch: PermissionBranch, permission=None) -> models.Q:
+    """
+    Return the condition matching the objects on which one of "userroles" grants permissions, or "permission" if provided, through "branch".
+    """
+    local_role_qs = get_branch_userroles(userroles, branch, permission)
+    return models.Q(
+        **{f"{branch.path}__in": models.Subquery(local_role_qs.values("object_id"))}
+    )
+
+
+def get_perm_exists(
+    user, model: Type[models.Model], permission: str
+) -> models.Expression:
+    """
+    Return a boolean expression, to be used in a QuerySet of "model", which is True for the rows on which "user" has "permission".
+    It follows the same branches as "get_perm_qs_for_user".
+    """
+    if isinstance(user, AnonymousUser):
+        return models.Value(False)
+
+    branches = registry.get_permission_branches(model, permission)
+    if not branches:
+        return models.Value(False)
+
+    condition = models.Q()
+    for branch in branches:
+        condition |= get_branch_condition(branch, permission) & models.Q(
+            object_id=models.OuterRef(branch.path)
+        )
+    return models.Exists(UserRole.objects.filter(condition, user=user))
+
+
+def annotate_permissions(
+    qs: models.QuerySet[T], user, permissions: Iterable[str]
 ) -> models.QuerySet[T]:
-    qs = model.objects.none()
-    named_role_qs = userrole_qs.filter(
-        role_class=get_roleclass(role_class).get_class_name()
+    """
+    Annotate every row of "qs" with one boolean per permission telling whether "user" has it on that row.
+    The annotation of "app_label.codename" is named "can_<codename>".
+    """
+    return qs.annotate(
+        **{
+            f"can_{permission.split('.')[-1]}": get_perm_exists(
+                user, qs.model, permission
+            )
+            for permission in permissions
+        }
     )
 
-    if (
-        role_class.all_models
-        or (not parent_model and model in role_class.models)
-        or (parent_model and parent_model in role_class.models)
-    ) and permission in role_class.allow:
-        if parent_model:
-            ct_objs = ContentType.objects.get_for_models(model, parent_model).values()
-            local_role_qs = named_role_qs.filter(content_type__in=ct_objs)
-            path_to_id = model._meta.get_ancestor_link(parent_model).attname
-            filter_kwargs = {
-                f"{path_to_id}__in": models.Subquery(local_role_qs.values("object_id"))
-            }
+
+def stream_branch_rows(
+    objects: models.QuerySet,
+    branches: List[PermissionBranch],
+    userroles: models.QuerySet[UserRole],
+    fields: Sequence[str] = ("user_id", "role_class"),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    permission: Optional[str] = None,
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Stream one row per (object of "objects", UserRole of "userroles") pair
+    joined through one of "branches", as (object id, branch, *fields). If
+    "permission" is provided, only the UserRoles granting it are joined.
+
+    The join is done by the database in a single UNION ALL query and the rows
+    are read through a server-side cursor where the backend supports it, so
+    memory usage does not depend on the number of rows.
+    """
+    if not branches:
+        return
+
+    db = userroles.db
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    selects = []
+    params: List[Any] = []
+
+    for index, branch in enumerate(branches):
+        objects_qs = (
+            objects.using(db)
+            .order_by()
+            .values(orca_object=models.F("pk"), orca_anchor=models.F(branch.path))
+        )
+        roles_qs = (
+            get_branch_userroles(userroles, branch, permission)
+            .order_by()
+            .values(
+                orca_anchor=models.F("object_id"),
+                **{f"orca_{i}": models.F(field) for i, field in enumerate(fields)},
+            )
+        )
+        objects_sql, objects_params = objects_qs.query.get_compiler(db).as_sql()
+        roles_sql, roles_params = roles_qs.query.get_compiler(db).as_sql()
+        columns = ", ".join(f"r.{quote(f'orca_{i}')}" for i in range(len(fields)))
+        selects.append(
+            f"SELECT o.{quote('orca_object')}, {index}, {columns} "
+            f"FROM ({objects_sql}) o INNER JOIN ({roles_sql}) r "
+            f"ON o.{quote('orca_anchor')} = r.{quote('orca_anchor')}"
+        )
+        params.extend(objects_params)
+        params.extend(roles_params)
+
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(" UNION ALL ".join(selects), params)
+        while rows := cursor.fetchmany(chunk_size):
+            for object_id, index, *values in rows:
+                yield (object_id, branches[index], *values)
+
+
+def get_perm_pairs_for_users(
+    users: Union[models.QuerySet, Iterable[AbstractBaseUser]],
+    model: Type[models.Model],
+    permission: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[Any, Any]]:
+    """
+    Yield a (user id, object id) pair for every object of "model" on which one of "users" has "permission".
+    A pair is yielded once per role granting the permission, so it can repeat.
+    """
+    rows = stream_branch_rows(
+        model._default_manager.all(),
+        registry.get_permission_branches(model, permission),
+        UserRole.objects.filter(user__in=users),
+        fields=("user_id",),
+        chunk_size=chunk_size,
+        permission=permission,
+    )
+    for object_id, _, user_id in rows:
+        yield user_id, object_id
+
+
+@instrument
+def get_perm_ids_for_users(
+    users: Union[models.QuerySet, Iterable[AbstractBaseUser]],
+    model: Type[models.Model],
+    permission: str,
+) -> Dict[Any, Set[Any]]:
+    """
+    Return a dictionary mapping the id of each of "users" having "permission" on any object of "model" to the ids of those objects.
+    """
+    result: Dict[Any, Set[Any]] = {}
+    for user_id, object_id in get_perm_pairs_for_users(users, model, permission):
+        result.setdefault(user_id, set()).add(object_id)
+    return result
+
+
+def get_users_with_permission(
+    permission: str, obj: models.Model
+) -> models.QuerySet[AbstractBaseUser]:
+    """
+    Return a QuerySet of the users who have "permission" on "obj", either from a role attached to the object itself or inherited from one of its parents.
+    """
+    model = obj._meta.model
+    branches = registry.get_permission_branches(model, permission)
+    if not branches:
+        return get_user_model().objects.none()
+
+    condition = models.Q()
+    for branch in branches:
+        if branch.path == "pk":
+            object_ids = [obj.pk]
         else:
-            ct_obj = ContentType.objects.get_for_model(model)
-            local_role_qs = named_role_qs.filter(content_type=ct_obj)
-            filter_kwargs = {
-                "id__in": models.Subquery(local_role_qs.values("object_id"))
-            }
-        qs |= model.objects.filter(**filter_kwargs)
-
-    if permission in role_class.inherit_allow:
-        parents = registry.get_perm_inheritance_tree(model)
-        for attname, parent in parents.items():
-            # Check whether there is a role with allow_inherit
-            if role_class.all_models or parent in role_class.models:
-                parent_ct = ContentType.objects.get_for_model(parent)
-                local_role_qs = named_role_qs.filter(content_type=parent_ct)
-                kwargs = {
-                    f"{attname}__in": models.Subquery(local_role_qs.values("object_id"))
-                }
-                qs |= model.objects.filter(**kwargs)
-
-    return qs
+            object_ids = model._base_manager.filter(pk=obj.pk).values(branch.path)
+        condition |= get_branch_condition(branch, permission) & models.Q(
+            object_id__in=object_ids
+        )
 
+    roles = UserRole.objects.filter(condition, user=models.OuterRef("pk"))
+    return get_user_model().objects.filter(models.Exists(roles))
+
+
+@instrument
+def get_user_ids_with_permission(
+    permission: str, objs: Iterable[models.Model]
+) -> Dict[Any, Set[Any]]:
+    """
+    Return a dictionary mapping the id of each of "objs" to the ids of the users who have "permission" on it.
+    "objs" is a QuerySet or a list of instances of the same model.
+    """
+    if isinstance(objs, models.QuerySet):
+        model = objs.model
+        object_ids = objs.values("pk")
+    else:
+        objs = list(objs)
+        if not objs:
+            return {}
+        model = objs[0]._meta.model
+        object_ids = [obj.pk for obj in objs]
+
+    result: Dict[Any, Set[Any]] = {}
+    rows = stream_branch_rows(
+        model._base_manager.filter(pk__in=object_ids),
+        registry.get_permission_branches(model, permission),
+        UserRole.objects.all(),
+        fields=("user_id",),
+        permission=permission,
+    )
+    for object_id, _, user_id in rows:
+        result.setdefault(object_id, set()).add(user_id)
+    return result
+
+
+@instrument
+def get_permissions_for_object(user, obj: models.Model) -> Set[str]:
+    """
+    Return the set of permissions "user" has on "obj", from the roles attached to the object itself and to any of its parents.
+    The roles are fetched in a single query, which also tells through which branches each of them applies.
+    """
+    if isinstance(user, AnonymousUser):
+        return set()
+
+    branches = registry.get_permission_branches(obj._meta.model)
+    if not branches:
+        return set()
+
+    query = _get_object_branch_roles(user, obj, branches)
+    return _resolve_branch_roles(branches, query)
+
+
+@instrument
+def get_permissions_for_objects(
+    user, objs: Iterable[models.Model]
+) -> Dict[Any, Set[str]]:
+    """
+    Return a dictionary mapping the id of each of "objs" to the set of permissions "user" has on it, like "get_permissions_for_object" but in a single query for all of them.
+    "objs" is a QuerySet or a list of instances of the same model. The objects on which "user" has no permission are left out.
+    """
+    if isinstance(user, AnonymousUser):
+        return {}
+
+    if isinstance(objs, models.QuerySet):
+        model = objs.model
+        object_ids = objs.values("pk")
+    else:
+        objs = list(objs)
+        if not objs:
+            return {}
+        model = objs[0]._meta.model
+        object_ids = [obj.pk for obj in objs]
+
+    # A UserRole comes once per override row, the permissions it grants are
+    # only known once all of them are read.
+    roles: Dict[Tuple[Any, PermissionBranch, Any], Tuple[str, List]] = {}
+    rows = stream_branch_rows(
+        model._base_manager.filter(pk__in=object_ids),
+        registry.get_permission_branches(model),
+        UserRole.objects.filter(user=user),
+        fields=("pk", "role_class", *get_override_fields()),
+    )
+    for object_id, branch, pk, role_s, *values in rows:
+        _, overrides = roles.setdefault((object_id, branch, pk), (role_s, []))
+        overrides.extend(get_overrides(role_s, values))
+
+    result: Dict[Any, Set[str]] = {}
+    for (object_id, branch, _), (role_s, overrides) in roles.items():
+        granted = branch.get_granted(registry.roles_map[role_s], overrides)
+        result.setdefault(object_id, set()).update(granted)
+    return {object_id: perms for object_id, perms in result.items() if perms}
+
+
+async def aget_permissions_for_object(user, obj: models.Model) -> Set[str]:
+    """
+    Async version of "get_permissions_for_object".
+    """
+    if isinstance(user, AnonymousUser):
+        return set()
+
+    branches = registry.get_permission_branches(obj._meta.model)
+    if not branches:
+        return set()
+
+    await aensure_content_types(*[branch.model for branch in branches])
+    query = _get_object_branch_roles(user, obj, branches)
+    return _resolve_branch_roles(branches, [row async for row in query])
+
+
+def _get_object_branch_roles(user, obj: models.Model, branches):
+    # One row per role of "user" on "obj" or its parents, with a flag per branch
+    model = obj._meta.model
+    condition = models.Q()
+    flags = {}
+    for index, branch in enumerate(branches):
+        if branch.path == "pk":
+            object_ids = [obj.pk]
+        else:
+            object_ids = model._base_manager.filter(pk=obj.pk).values(branch.path)
+        branch_condition = get_branch_condition(branch) & models.Q(
+            object_id__in=object_ids
+        )
+        condition |= branch_condition
+        flags[f"orca_branch_{index}"] = models.ExpressionWrapper(
+            branch_condition, output_field=models.BooleanField()
+        )
+
+    return (
+        UserRole.objects.filter(condition, user=user)
+        .annotate(**flags)
+        .values_list("pk", "role_class", *flags, *get_override_fields())
+    )
+
+
+def _resolve_branch_roles(branches, rows) -> Set[str]:
+    # A UserRole comes once per override row
+    roles: Dict[Any, Tuple[str, Sequence[bool], List]] = {}
+    for pk, role_s, *values in rows:
+        matches, values = values[: len(branches)], values[len(branches) :]
+        _, _, overrides = roles.setdefault(pk, (role_s, matches, []))
+        overrides.extend(get_overrides(role_s, values))
+
+    permissions: Set[str] = set()
+    for role_s, matches, overrides in roles.values():
+        role = registry.roles_map[role_s]
+        for branch, matched in zip(branches, matches):
+            if matched:
+                permissions.update(branch.get_granted(role, overrides))
+    return permissions
+
+
+def _get_prefetch_attr(user) -> str:
+    return f"orca_roles_{user.pk}"
+
+
+def _get_anchor_lookup(model: Type[models.Model], branch: PermissionBranch) -> str:
+    """
+    Return the lookup from "model" to the object the roles of "branch" are attached to.
+    """
+    if branch.kind == BRANCH_PARENT:
+        return model._meta.get_ancestor_link(branch.model).name
+    return branch.path
+
+
+def prefetch_user_roles(qs: models.QuerySet[T], user) -> models.QuerySet[T]:
+    """
+    Prefetch the UserRoles of "user" attached to the objects of "qs" and to their parents.
+    "has_role" and "has_permission" called with "user" on the fetched objects are then answered without a query.
+    """
+    if isinstance(user, AnonymousUser):
+        return qs
 
-def get_perm_qs_for_user(user, model: Type[T], permission: str) -> models.QuerySet[T]:
-    qs = model.objects.none()
     userroles = UserRole.objects.filter(user=user)
+    if get_check_overrides() and get_permission_storage() != PERMISSION_STORAGE_BITMASK:
+        # The overrides of the roles, for "has_permission"
+        userroles = userroles.prefetch_related(
+            models.Prefetch(
+                "accesses",
+                queryset=RolePermission.objects.select_related(
+                    "permission__content_type"
+                ),
+            )
+        )
+    to_attr = _get_prefetch_attr(user)
+    lookups = {"roles"}
+    for branch in registry.get_permission_branches(qs.model):
+        if branch.kind != BRANCH_DIRECT:
+            lookups.add(f"{_get_anchor_lookup(qs.model, branch)}__roles")
+
+    return qs.prefetch_related(
+        *[
+            models.Prefetch(lookup, queryset=userroles, to_attr=to_attr)
+            for lookup in sorted(lookups)
+        ]
+    )
+
+
+def get_prefetched_userroles(user, obj: models.Model) -> Optional[List[UserRole]]:
+    """
+    Return the UserRoles of "user" attached to "obj" by "prefetch_user_roles", or None if they were not prefetched.
+    """
+    return getattr(obj, _get_prefetch_attr(user), None)
 
-    for role in registry.get_roles_for_perm(permission):
-        qs |= get_objects_for_role(model, role, permission, userroles)
-        if role.follow_model_inheritance:
-            for parent in model._meta.get_parent_list():
-                qs |= get_objects_for_role(
-                    model, role, permission, userroles, parent_model=parent
-                )
 
-    return qs
+def get_prefetched_permission(
+    user, obj: models.Model, permission: str
+) -> Optional[bool]:
+    """
+    Tell whether "user" has "permission" on "obj" from the roles prefetched by "prefetch_user_roles".
+    Return None if some of the roles needed were not prefetched.
+    """
+    model = obj._meta.model
+    for branch in registry.get_permission_branches(model, permission):
+        anchor: Optional[models.Model] = obj
+        if branch.kind != BRANCH_DIRECT:
+            for name in _get_anchor_lookup(model, branch).split(LOOKUP_SEP):
+                if anchor is None:
+                    break
+                # Following a relation which was not fetched would query
+                if not anchor._meta.get_field(name).is_cached(anchor):
+                    return None
+                anchor = getattr(anchor, name)
+        if anchor is None:
+            continue
+
+        userroles = get_prefetched_userroles(user, anchor)
+        if userroles is None:
+            return None
+        for userrole in userroles:
+            role = registry.roles_map.get(userrole.role_class)
+            if role not in branch.roles:
+                continue
+            overrides = (
+                get_userrole_overrides(userrole)
+                if branch.kind != BRANCH_INHERITED
+                else ()
+            )
+            if permission in branch.get_granted(role, overrides):
+                return True
+    return False
 
 
 def get_userroles(
@@ -182,6 +785,22 @@ def get_userroles(
     return query
 
 
+async def aget_userroles(
+    user: Union[AbstractBaseUser, Iterable[AbstractBaseUser]],
+    role_class: RoleQ = None,
+    obj: Optional[models.Model] = None,
+    model_class: ModelQ = None,
+) -> List[UserRole]:
+    """
+    Async version of "get_userroles", returning a list.
+    """
+    await aensure_content_types(
+        *[model._meta.model for model in (obj, model_class) if model is not None]
+    )
+    query = get_userroles(user, role_class=role_class, obj=obj, model_class=model_class)
+    return [userrole async for userrole in query]
+
+
 def get_user_roles_strings(user, obj: Optional[models.Model] = None):
     """
     Return a list of role classes associated to "user".
@@ -191,6 +810,16 @@ def get_user_roles_strings(user, obj: Optional[models.Model] = None):
     return [get_roleclass(ur_obj.role_class) for ur_obj in get_userroles(user, obj=obj)]
 
 
+async def aget_user_roles_strings(user, obj: Optional[models.Model] = None):
+    """
+    Async version of "get_user_roles_strings".
+    """
+    return [
+        get_roleclass(ur_obj.role_class)
+        for ur_obj in await aget_userroles(user, obj=obj)
+    ]
+
+
 def get_permissions_from_roles(roles: Iterable[UserRole], clean=False) -> List:
     """
     roles: list or QuerySet of UserRole objects
@@ -1,6 +1,7 @@
 from django.db import models
 
 from django_orca import shortcuts
+from django_orca.auth.getters import DEFAULT_CHUNK_SIZE
 
 
 class UserRoleMixin(models.Model):
@@ -18,14 +19,26 @@ class UserRoleMixin(models.Model):
     def has_role(self, role_class=None, obj=None):
         return shortcuts.has_role(self, role_class, obj)
 
+    async def ahas_role(self, role_class=None, obj=None):
+        return await shortcuts.ahas_role(self, role_class, obj)
+
     def assign_role(self, role_class, obj=None):
         return shortcuts.assign_role(self, role_class, obj)
 
+    async def aassign_role(self, role_class, obj=None):
+        return await shortcuts.aassign_role(self, role_class, obj)
+
     def remove_role(self, role_class=None, obj=None):
         return shortcuts.remove_role(self, role_class, obj)
 
+    async def aremove_role(self, role_class=None, obj=None):
+        return await shortcuts.aremove_role(self, role_class, obj)
+
     def get_objects(self, role_class=None, model=None):
         return shortcuts.get_objects(self, role_class, model)
 
-    def get_objects_qs(self, model, role_class=None):
-        return shortcuts.get_qs_for_user(self, model, role_class)
+    def iter_objects(self, role_class=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        return shortcuts.iter_objects(self, role_class, chunk_size)
+
+    def get_objects_qs(self, model, role_class=None, inherit=True):
+        return shortcuts.get_qs_for_user(self, model, role_class, inherit)
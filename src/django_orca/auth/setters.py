@@ -2,43 +2,52 @@ from typing import List, Optional, Type
 
 from django.contrib.auth.models import AbstractBaseUser
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
 
+from django_orca.instrumentation import instrument
+from django_orca.registry import registry
 from django_orca.roles import Role
 
-from ..exceptions import InvalidRoleAssignment
-from ..models import UserRole
-from ..utils import check_my_model, delete_from_cache, get_roleclass, is_unique_together
-from .checkers import has_role
+from ..exceptions import InvalidPermissionAssignment, InvalidRoleAssignment
+from ..models import RolePermission, UserRole
+from ..utils import (
+    PERMISSION_STORAGE_BITMASK,
+    adelete_from_cache,
+    aensure_content_types,
+    check_my_model,
+    delete_from_cache,
+    get_permission_storage,
+    get_permission_template,
+    get_roleclass,
+    is_unique_together,
+    string_to_permission,
+)
+from .checkers import ahas_role, has_role
 from .getters import get_user_roles_strings, get_userroles, get_users
 
 RoleQ = Optional[Type[Role]]
 
 
+@instrument
 def assign_role(user, role_class: Type[Role], obj=None):
     if not has_role(user, role_class=role_class, obj=obj):
         assign_roles([user], role_class, obj)
 
 
+async def aassign_role(user, role_class: Type[Role], obj=None):
+    """
+    Async version of "assign_role".
+    """
+    if not await ahas_role(user, role_class=role_class, obj=obj):
+        await aassign_roles([user], role_class, obj)
+
+
+@instrument
 def assign_roles(users_list: List[AbstractBaseUser], role_class: Type[Role], obj=None):
     # TODO: There should be a flag to ignore assigning a role twice
     users_set = set(users_list)
     role = get_roleclass(role_class)
-
-    # Check if object belongs to the role class.
-    check_my_model(role, obj)
-
-    # If no object is provided but the role needs specific models.
-    if not obj and not role.all_models:
-        raise InvalidRoleAssignment(
-            'The role "%s" must be assigned with a object.' % role.get_verbose_name()
-        )
-
-    # If a object is provided but the role does not needs a object.
-    if obj and role.all_models:
-        raise InvalidRoleAssignment(
-            'The role "%s" must not be assigned with a object.'
-            % role.get_verbose_name()
-        )
+    _check_assignment(role, users_list, obj)
 
     # Check if the model accepts multiple roles
     # attached using the same User instance.
@@ -52,13 +61,6 @@ def assign_roles(users_list: List[AbstractBaseUser], role_class: Type[Role], obj
                 )
 
     if role.unique is True:
-        # If the role is marked as unique but multiple users are provided.
-        if len(users_list) > 1:
-            raise InvalidRoleAssignment(
-                'Multiple users were provided using "%s", '
-                "but it is marked as unique." % role.get_verbose_name()
-            )
-
         # If the role is marked as unique but already has an user attached.
         has_user = get_users(role_class=role, obj=obj)
         if has_user:
@@ -68,20 +70,83 @@ def assign_roles(users_list: List[AbstractBaseUser], role_class: Type[Role], obj
             )
 
     for user in users_set:
-        if obj:
-            UserRole.objects.get_or_create(
-                role_class=role.get_class_name(),
-                user=user,
-                content_type=ContentType.objects.get_for_model(obj),
-                object_id=obj.id,
-            )
-        else:
-            UserRole.objects.get_or_create(role_class=role.get_class_name(), user=user)
+        UserRole.objects.get_or_create(**_get_assignment_kwargs(role, user, obj))
 
         # Cleaning the cache system.
         delete_from_cache(user, obj)
 
 
+async def aassign_roles(
+    users_list: List[AbstractBaseUser], role_class: Type[Role], obj=None
+):
+    """
+    Async version of "assign_roles".
+    """
+    users_set = set(users_list)
+    role = get_roleclass(role_class)
+    _check_assignment(role, users_list, obj)
+    if obj:
+        await aensure_content_types(obj._meta.model)
+
+    # Check if the model accepts multiple roles
+    # attached using the same User instance.
+    if obj and is_unique_together(obj):
+        for user in users_set:
+            if await get_userroles(user, obj=obj).aexists():
+                raise InvalidRoleAssignment(
+                    'The user "%s" already has a role attached '
+                    'to the object "%s".' % (user, obj)
+                )
+
+    if role.unique is True:
+        # If the role is marked as unique but already has an user attached.
+        if await get_users(role_class=role, obj=obj).aexists():
+            raise InvalidRoleAssignment(
+                'The object "%s" already has a "%s" attached '
+                "and it is marked as unique." % (obj, role.get_verbose_name())
+            )
+
+    for user in users_set:
+        await UserRole.objects.aget_or_create(**_get_assignment_kwargs(role, user, obj))
+
+        # Cleaning the cache system.
+        await adelete_from_cache(user, obj)
+
+
+def _check_assignment(role: Type[Role], users_list, obj):
+    # Check if object belongs to the role class.
+    check_my_model(role, obj)
+
+    # If no object is provided but the role needs specific models.
+    if not obj and not role.all_models:
+        raise InvalidRoleAssignment(
+            'The role "%s" must be assigned with a object.' % role.get_verbose_name()
+        )
+
+    # If a object is provided but the role does not needs a object.
+    if obj and role.all_models:
+        raise InvalidRoleAssignment(
+            'The role "%s" must not be assigned with a object.'
+            % role.get_verbose_name()
+        )
+
+    # If the role is marked as unique but multiple users are provided.
+    if role.unique is True and len(users_list) > 1:
+        raise InvalidRoleAssignment(
+            'Multiple users were provided using "%s", '
+            "but it is marked as unique." % role.get_verbose_name()
+        )
+
+
+def _get_assignment_kwargs(role: Type[Role], user, obj):
+    kwargs = {"role_class": role.get_class_name(), "user": user}
+    if obj:
+        kwargs["content_type"] = ContentType.objects.get_for_model(obj)
+        kwargs["object_id"] = obj.id
+    return kwargs
+
+
+@instrument
 def remove_role(user, role_class=None, obj=None):
     """
     Proxy method to be used for one User instance.
@@ -89,6 +154,7 @@ def remove_role(user, role_class=None, obj=None):
     remove_roles([user], role_class, obj)
 
 
+@instrument
 def remove_roles(users_list, role_class=None, obj=None):
     """
     Delete all RolePermission objects in the database referencing the followling role_class to the user.
@@ -102,3 +168,68 @@ def remove_roles(users_list, role_class=None, obj=None):
 
     # Cleaning the database.
     query.delete()
+
+
+async def aremove_role(user, role_class=None, obj=None):
+    """
+    Async version of "remove_role".
+    """
+    await aremove_roles([user], role_class, obj)
+
+
+async def aremove_roles(users_list, role_class=None, obj=None):
+    """
+    Async version of "remove_roles".
+    """
+    if obj:
+        await aensure_content_types(obj._meta.model)
+    query = get_userroles(users_list, role_class=role_class, obj=obj)
+
+    # Cleaning the cache system.
+    for user in users_list:
+        await adelete_from_cache(user, obj)
+
+    # Cleaning the database.
+    await query.adelete()
+
+
+@instrument
+def set_role_permission(user, role_class, permission, obj=None, access=True):
+    """
+    Override the access to "permission" for the role "role_class" the user holds on "obj".
+    Only this role assignment is affected, not the role class definition.
+    """
+    role = get_roleclass(role_class)
+    userrole = get_userroles(user, role_class=role, obj=obj).get()
+
+    perm_obj = string_to_permission(permission)
+    if perm_obj.id not in get_permission_template(role):
+        raise InvalidPermissionAssignment(
+            'The permission "%s" does not belong to the models of the Role "%s".'
+            % (permission, role.get_verbose_name())
+        )
+
+    # Permissions added to the database only, and not to the models' Meta, have
+    # no bit in the permission mask.
+    bitmask = get_permission_storage() == PERMISSION_STORAGE_BITMASK
+    ordinals = registry.get_permission_ordinals(role) if bitmask else {}
+    if bitmask and permission not in ordinals:
+        raise InvalidPermissionAssignment(
+            'The permission "%s" has no bit in the permission mask of the Role "%s".'
+            % (permission, role.get_verbose_name())
+        )
+
+    RolePermission.objects.update_or_create(
+        role=userrole, permission=perm_obj, defaults={"access": access}
+    )
+
+    # Flipping the bit of the permission mask.
+    if bitmask:
+        bit = 1 << ordinals[permission]
+        mask = F("permission_mask")
+        UserRole.objects.filter(pk=userrole.pk).update(
+            permission_mask=mask.bitor(bit) if access else mask.bitand(~bit)
+        )
+
+    # Cleaning the cache system.
+    delete_from_cache(user, obj)
@@ -0,0 +1,184 @@
+"""
+Record what every public orca call costs: SQL queries, rows written, cache
+hits and misses and wall time.
+
+Nothing is measured unless a profile is active, a receiver is connected to
+"orca_call" or the SLOW_CALL_THRESHOLD setting is set, in which case the
+decorated functions only pay for a few attribute lookups.
+
+The functions returning a QuerySet are not instrumented: the QuerySet is lazy,
+so its queries run after the call returned, where the code evaluating it can
+measure them.
+"""
+
+import functools
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.db import connections
+from django.dispatch import Signal
+
+slow_logger = logging.getLogger("django_orca.slow")
+
+# Sent after every instrumented call with a "call" keyword argument.
+orca_call = Signal()
+
+
+class OrcaCall(NamedTuple):
+    """
+    The cost of one instrumented call. "rows" counts the rows written by
+    INSERT, UPDATE and DELETE statements, as reported by the database driver.
+    """
+
+    name: str
+    duration: float
+    queries: int
+    rows: int
+    cache_hits: int
+    cache_misses: int
+    sql: Tuple[str, ...]
+
+
+class _Measure:
+    def __init__(self):
+        self.sql: List[str] = []
+        self.rows = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.sql.append(sql)
+        result = execute(sql, params, many, context)
+        rowcount = getattr(context["cursor"], "rowcount", -1)
+        if rowcount > 0 and sql.lstrip()[:6].upper() != "SELECT":
+            self.rows += rowcount
+        return result
+
+
+class OrcaProfile:
+    """
+    Collect the instrumented calls made while it is active, like
+    django.test.utils.CaptureQueriesContext does for queries.
+    """
+
+    def __init__(self):
+        self.calls: List[OrcaCall] = []
+
+    def __len__(self):
+        return len(self.calls)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the totals of the recorded calls, grouped by function name.
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            total = totals.setdefault(
+                call.name,
+                {
+                    "calls": 0,
+                    "duration": 0.0,
+                    "queries": 0,
+                    "rows": 0,
+                    "cache_hits": 0,
+                    "cache_misses": 0,
+                },
+            )
+            total["calls"] += 1
+            total["duration"] += call.duration
+            total["queries"] += call.queries
+            total["rows"] += call.rows
+            total["cache_hits"] += call.cache_hits
+            total["cache_misses"] += call.cache_misses
+        return totals
+
+
+_profiles: ContextVar[Tuple[OrcaProfile, ...]] = ContextVar("orca_profiles", default=())
+_current: ContextVar[Optional[_Measure]] = ContextVar("orca_measure", default=None)
+
+
+@contextmanager
+def orca_profile() -> Iterator[OrcaProfile]:
+    """
+    Record the orca calls made inside the block into the yielded profile.
+    Profiles can be nested, every active profile records the calls.
+    """
+    profile = OrcaProfile()
+    token = _profiles.set(_profiles.get() + (profile,))
+    try:
+        yield profile
+    finally:
+        _profiles.reset(token)
+
+
+def get_slow_call_threshold() -> Optional[float]:
+    from .utils import get_config
+
+    return get_config("SLOW_CALL_THRESHOLD", None)
+
+
+def record_cache_access(hit: bool):
+    """
+    Count a lookup in the orca cache against the call being measured.
+    """
+    measure = _current.get()
+    if measure is not None:
+        if hit:
+            measure.cache_hits += 1
+        else:
+            measure.cache_misses += 1
+
+
+def instrument(func):
+    """
+    Measure the calls to "func". Calls made while another instrumented call
+    is running are counted in the outer one only.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current.get() is not None:
+            return func(*args, **kwargs)
+
+        profiles = _profiles.get()
+        threshold = get_slow_call_threshold()
+        if not profiles and threshold is None and not orca_call.has_listeners():
+            return func(*args, **kwargs)
+
+        measure = _Measure()
+        token = _current.set(measure)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(measure))
+                return func(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            _current.reset(token)
+            call = OrcaCall(
+                name=name,
+                duration=duration,
+                queries=len(measure.sql),
+                rows=measure.rows,
+                cache_hits=measure.cache_hits,
+                cache_misses=measure.cache_misses,
+                sql=tuple(measure.sql),
+            )
+            for profile in profiles:
+                profile.calls.append(call)
+            if threshold is not None and duration >= threshold:
+                slow_logger.warning(
+                    "Slow orca call %s: %.3fs, %d queries\n%s",
+                    name,
+                    duration,
+                    call.queries,
+                    "\n".join(call.sql),
+                )
+            orca_call.send(sender=func, call=call)
+
+    return wrapper
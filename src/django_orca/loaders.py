@@ -0,0 +1,82 @@
+"""
+Request-scoped batching of permission lookups.
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Set, Tuple, Type
+
+from django.db import models
+
+from django_orca.auth.getters import get_permissions_for_objects
+
+
+class PermissionLoader:
+    """
+    Batch the permission lookups of one user, DataLoader style.
+
+    Objects handed to "prime" are only collected. The first time the
+    permissions of one of them are needed, those of every collected object of
+    the same model are resolved together, in a single query, and kept for the
+    lifetime of the loader.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._permissions: Dict[Tuple[Type[models.Model], Any], Set[str]] = {}
+        self._pending: Dict[Type[models.Model], Dict[Any, models.Model]] = defaultdict(
+            dict
+        )
+
+    def prime(self, objs: Iterable[models.Model]):
+        """
+        Collect "objs", so that their permissions are fetched along with the
+        next lookup on an object of the same model.
+        """
+        for obj in objs:
+            model = obj._meta.model
+            if (model, obj.pk) not in self._permissions:
+                self._pending[model][obj.pk] = obj
+
+    def load(self, obj: models.Model) -> Set[str]:
+        """
+        Return the set of permissions the user has on "obj".
+        """
+        model = obj._meta.model
+        key = (model, obj.pk)
+        if key not in self._permissions:
+            self._pending[model][obj.pk] = obj
+            self._resolve(model)
+        return self._permissions[key]
+
+    def has_perm(self, obj: models.Model, permission: str) -> bool:
+        return permission in self.load(obj)
+
+    def clear(self):
+        """
+        Forget every resolved permission, e.g. after the roles were changed.
+        """
+        self._permissions.clear()
+
+    def _resolve(self, model: Type[models.Model]):
+        pending = self._pending.pop(model)
+        result = get_permissions_for_objects(self.user, list(pending.values()))
+        for pk in pending:
+            self._permissions[(model, pk)] = result.get(pk, set())
+
+
+def get_permission_loader(request) -> PermissionLoader:
+    """
+    Return the PermissionLoader of the user of "request", created on first use
+    and shared by everything handling the same request.
+    """
+    # A DRF Request authenticates on its own but wraps the Django HttpRequest
+    http_request = getattr(request, "_request", request)
+    loaders = getattr(http_request, "_orca_permission_loaders", None)
+    if loaders is None:
+        loaders = http_request._orca_permission_loaders = {}
+
+    user = request.user
+    loader = loaders.get(user.pk)
+    if loader is None:
+        loader = loaders[user.pk] = PermissionLoader(user)
+    return loader
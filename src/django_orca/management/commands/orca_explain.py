@@ -0,0 +1,142 @@
+import time
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, models
+
+from django_orca.auth.getters import (
+    get_branch_filter,
+    get_branch_userroles,
+    get_perm_exists,
+    get_perm_qs_for_user,
+)
+from django_orca.models import UserRole
+from django_orca.registry import registry
+from django_orca.utils import estimate_count
+
+STRATEGY_IN = "in"
+STRATEGY_EXISTS = "exists"
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the SQL and the query plan of the objects of a model a user has a "
+        "permission on, with the rows and timing of every permission branch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="Primary key of the user.")
+        parser.add_argument("--model", required=True, help="For example main.Course.")
+        parser.add_argument(
+            "--perm", required=True, help="For example main.change_course."
+        )
+        parser.add_argument(
+            "--strategy",
+            choices=[STRATEGY_IN, STRATEGY_EXISTS],
+            default=STRATEGY_IN,
+            help="in: the IN subqueries of get_perm_qs_for_user (default). "
+            "exists: the EXISTS of annotate_permissions, used as a filter.",
+        )
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run the query and show the actual plan (EXPLAIN ANALYZE), if "
+            "the database supports it.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=1,
+            help="Run every branch this many times and report the fastest run.",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        self.database = options["database"]
+        self.repeat = max(options["repeat"], 1)
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        try:
+            user = (
+                get_user_model()
+                ._default_manager.using(self.database)
+                .get(pk=options["user"])
+            )
+        except (get_user_model().DoesNotExist, ValueError):
+            raise CommandError('User "%s" does not exist.' % options["user"])
+
+        permission = options["perm"]
+        strategy = options["strategy"]
+        branches = registry.get_permission_branches(model, permission)
+        if not branches:
+            self.stdout.write(
+                'No role grants "%s" on %s.' % (permission, model._meta.label)
+            )
+            return
+
+        if strategy == STRATEGY_EXISTS:
+            qs = model._default_manager.filter(get_perm_exists(user, model, permission))
+        else:
+            qs = get_perm_qs_for_user(user, model, permission)
+        qs = qs.using(self.database)
+
+        sql, params = qs.query.sql_with_params()
+        self.stdout.write(
+            "Strategy: %s\n\nSQL:\n%s\nParams: %r\n" % (strategy, sql, params)
+        )
+
+        explain_options = {"analyze": True} if options["analyze"] else {}
+        try:
+            plan = qs.explain(**explain_options)
+        except ValueError as e:
+            raise CommandError(e)
+        self.stdout.write("\nEXPLAIN:\n%s\n" % plan)
+
+        self.stdout.write("\nBranches:")
+        userroles = UserRole.objects.using(self.database).filter(user=user)
+        for branch in branches:
+            if strategy == STRATEGY_EXISTS:
+                roles = get_branch_userroles(userroles, branch, permission).filter(
+                    object_id=models.OuterRef(branch.path)
+                )
+                branch_qs = model._default_manager.filter(models.Exists(roles))
+            else:
+                branch_qs = model._default_manager.filter(
+                    get_branch_filter(userroles, branch, permission)
+                )
+            self.write_timing(
+                "%s %s (%s: %s)"
+                % (
+                    branch.kind,
+                    branch.path,
+                    branch.model._meta.label_lower,
+                    ", ".join(role.get_class_name() for role in branch.roles),
+                ),
+                branch_qs.using(self.database),
+            )
+        self.write_timing("total", qs)
+
+    def write_timing(self, label, qs):
+        estimate = estimate_count(qs)
+        duration, rows = self.time_query(qs)
+        self.stdout.write(
+            "  %s: %s estimated, %d rows in %.2fms"
+            % (
+                label,
+                "n/a" if estimate is None else "%d rows" % estimate,
+                rows,
+                duration * 1000,
+            )
+        )
+
+    def time_query(self, qs):
+        best = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            rows = len(qs.values_list("pk", flat=True))
+            duration = time.perf_counter() - start
+            best = duration if best is None else min(best, duration)
+        return best, rows
@@ -0,0 +1,141 @@
+import csv
+import json
+from contextlib import nullcontext
+from itertools import islice
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from django_orca.auth.getters import DEFAULT_CHUNK_SIZE, stream_branch_rows
+from django_orca.models import RolePermission, UserRole
+from django_orca.registry import registry
+from django_orca.utils import (
+    PERMISSION_STORAGE_BITMASK,
+    get_check_overrides,
+    get_mask_accesses,
+    get_permission_storage,
+)
+
+ASSIGNMENT_FIELDS = ["user", "role", "content_type", "object_id"]
+EFFECTIVE_FIELDS = ["user", "permission", "content_type", "object_id", "role", "via"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every role assignment, or every effective permission including "
+        "inheritance, as JSONL or CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+        parser.add_argument(
+            "--effective",
+            action="store_true",
+            help="Export one row per permission granted on an object instead of "
+            "one row per role assignment.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "-o", "--output", help="Write to this file instead of stdout."
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        fields = EFFECTIVE_FIELDS if options["effective"] else ASSIGNMENT_FIELDS
+        output = options["output"]
+
+        with (
+            open(output, "w", newline="") if output else nullcontext(self.stdout)
+        ) as stream:
+            write = self.get_writer(stream, options["format"], fields)
+            if options["effective"]:
+                rows = self.iter_permissions(options["database"], options["chunk_size"])
+            else:
+                rows = self.iter_assignments(options["database"], options["chunk_size"])
+            for row in rows:
+                write(row)
+
+    def get_writer(self, stream, output_format, fields):
+        if output_format == "csv":
+            writer = csv.DictWriter(stream, fieldnames=fields, lineterminator="\n")
+            writer.writeheader()
+            return writer.writerow
+        return lambda row: stream.write(json.dumps(row) + "\n")
+
+    def iter_assignments(self, database, chunk_size):
+        username = f"user__{get_user_model().USERNAME_FIELD}"
+        query = (
+            UserRole.objects.using(database)
+            .order_by("pk")
+            .values_list(
+                username,
+                "role_class",
+                "content_type__app_label",
+                "content_type__model",
+                "object_id",
+            )
+        )
+        for user, role, app_label, model, object_id in query.iterator(chunk_size):
+            yield {
+                "user": user,
+                "role": role,
+                "content_type": f"{app_label}.{model}" if app_label else None,
+                "object_id": object_id,
+            }
+
+    def iter_permissions(self, database, chunk_size):
+        username = f"user__{get_user_model().USERNAME_FIELD}"
+        userroles = UserRole.objects.using(database).all()
+        bitmask = get_permission_storage() == PERMISSION_STORAGE_BITMASK
+        rows_overrides = get_check_overrides() and not bitmask
+        fields = (username, "role_class", "pk", "permission_mask")
+
+        for model in apps.get_models():
+            branches = registry.get_permission_branches(model)
+            rows = stream_branch_rows(
+                model._base_manager.using(database).all(),
+                branches,
+                userroles,
+                fields=fields,
+                chunk_size=chunk_size,
+            )
+            # The override rows are read for a chunk of roles at a time.
+            while chunk := list(islice(rows, chunk_size)):
+                overrides = {}
+                if rows_overrides:
+                    overrides = self.get_overrides(database, {row[4] for row in chunk})
+                for object_id, branch, user, role_class, pk, mask in chunk:
+                    role = registry.roles_map[role_class]
+                    if bitmask:
+                        role_overrides = get_mask_accesses(role, mask)
+                    else:
+                        role_overrides = overrides.get(pk, [])
+                    for permission in sorted(branch.get_granted(role, role_overrides)):
+                        yield {
+                            "user": user,
+                            "permission": permission,
+                            "content_type": model._meta.label_lower,
+                            "object_id": object_id,
+                            "role": role_class,
+                            "via": f"{branch.kind}:{branch.path}",
+                        }
+
+    def get_overrides(self, database, role_ids):
+        overrides = {}
+        query = (
+            RolePermission.objects.using(database)
+            .filter(role__in=role_ids)
+            .values_list(
+                "role_id",
+                "permission__content_type__app_label",
+                "permission__codename",
+                "access",
+            )
+        )
+        for role_id, app_label, codename, access in query:
+            overrides.setdefault(role_id, []).append(
+                ("%s.%s" % (app_label, codename), access)
+            )
+        return overrides
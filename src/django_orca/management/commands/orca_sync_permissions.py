@@ -0,0 +1,176 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from django_orca.auth.getters import DEFAULT_CHUNK_SIZE
+from django_orca.exceptions import RoleNotFound
+from django_orca.models import RolePermission, UserRole
+from django_orca.registry import registry
+from django_orca.utils import (
+    PERMISSION_STORAGE_BITMASK,
+    PERMISSION_STORAGE_ROWS,
+    get_permission_mask,
+    get_permission_storage,
+    get_permission_template,
+    get_roleclass,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the stored permissions of every role assignment in line with the "
+        "current allow/deny definition of its role."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "roles",
+            nargs="*",
+            help="Only synchronize these role classes (default: all registered roles).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--start-after",
+            type=int,
+            default=0,
+            help="Skip role assignments with an id lower or equal to this one.",
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="In virtual and bitmask storage, delete the RolePermission rows "
+            "which do not override the role definition.",
+        )
+        parser.add_argument(
+            "--reset-overrides",
+            action="store_true",
+            help="Bring the RolePermission rows which differ from the role "
+            "definition, like the overrides of set_role_permission, back in line "
+            "with it. By default they are kept and counted.",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        self.database = options["database"]
+        self.storage = get_permission_storage()
+        try:
+            roles = [get_roleclass(role) for role in options["roles"]]
+        except RoleNotFound as e:
+            raise CommandError(e)
+
+        for role in roles or registry.roles_map.values():
+            inserted, updated, deleted, kept = self.sync_role(
+                role,
+                options["chunk_size"],
+                options["start_after"],
+                options["prune"],
+                options["reset_overrides"],
+            )
+            self.stdout.write(
+                "%s: %d inserted, %d updated, %d deleted, %d overrides kept"
+                % (role.get_class_name(), inserted, updated, deleted, kept)
+            )
+
+    def sync_role(self, role, chunk_size, start_after, prune, reset_overrides):
+        """
+        Synchronize the role assignments of "role" one chunk of UserRole ids at a
+        time. Every chunk is committed on its own, so an interrupted run can be
+        resumed with "--start-after" or simply run again.
+
+        The rows differing from the role definition cannot be told apart from
+        the overrides of "set_role_permission", so they are only changed with
+        "reset_overrides".
+        """
+        template = get_permission_template(role, using=self.database)
+        allowed = [perm_id for perm_id, access in template.items() if access]
+        denied = [perm_id for perm_id, access in template.items() if not access]
+        inserted = updated = deleted = kept = 0
+
+        userroles = (
+            UserRole.objects.using(self.database)
+            .filter(role_class=role.get_class_name())
+            .order_by("pk")
+            .values_list("pk", "permission_mask")
+        )
+        last_id = start_after
+        while chunk := list(userroles.filter(pk__gt=last_id)[:chunk_size]):
+            last_id = chunk[-1][0]
+            role_ids = [role_id for role_id, _ in chunk]
+
+            with transaction.atomic(using=self.database):
+                rows = RolePermission.objects.using(self.database).filter(
+                    role_id__in=role_ids
+                )
+                deleted += rows.exclude(permission_id__in=template).delete()[0]
+                overrides = rows.filter(
+                    Q(permission_id__in=allowed, access=False)
+                    | Q(permission_id__in=denied, access=True)
+                )
+
+                if not reset_overrides:
+                    kept += overrides.count()
+                elif self.storage == PERMISSION_STORAGE_ROWS:
+                    updated += rows.filter(
+                        permission_id__in=allowed, access=False
+                    ).update(access=True)
+                    updated += rows.filter(
+                        permission_id__in=denied, access=True
+                    ).update(access=False)
+                else:
+                    deleted += overrides.delete()[0]
+
+                if self.storage == PERMISSION_STORAGE_ROWS:
+                    inserted += self.insert_missing(rows, role_ids, template)
+                else:
+                    # The stored rows are per-instance overrides.
+                    if prune:
+                        deleted += rows.filter(
+                            permission_id__in=allowed, access=True
+                        ).delete()[0]
+                        deleted += rows.filter(
+                            permission_id__in=denied, access=False
+                        ).delete()[0]
+                    if self.storage == PERMISSION_STORAGE_BITMASK:
+                        updated += self.update_masks(role, rows, chunk)
+
+            if self.verbosity > 1:
+                self.stdout.write(
+                    "%s: synchronized up to id %d" % (role.get_class_name(), last_id)
+                )
+
+        return inserted, updated, deleted, kept
+
+    def insert_missing(self, rows, role_ids, template):
+        existing = set(rows.values_list("role_id", "permission_id"))
+        missing = [
+            RolePermission(role_id=role_id, permission_id=perm_id, access=access)
+            for role_id in role_ids
+            for perm_id, access in template.items()
+            if (role_id, perm_id) not in existing
+        ]
+        RolePermission.objects.using(self.database).bulk_create(
+            missing, ignore_conflicts=True
+        )
+        return len(missing)
+
+    def update_masks(self, role, rows, chunk):
+        overrides = defaultdict(list)
+        for role_id, app_label, codename, access in rows.values_list(
+            "role_id",
+            "permission__content_type__app_label",
+            "permission__codename",
+            "access",
+        ):
+            overrides[role_id].append(("%s.%s" % (app_label, codename), access))
+
+        changed = []
+        for role_id, mask in chunk:
+            new_mask = get_permission_mask(role, overrides[role_id])
+            if new_mask != mask:
+                changed.append(UserRole(pk=role_id, permission_mask=new_mask))
+
+        UserRole.objects.using(self.database).bulk_update(changed, ["permission_mask"])
+        return len(changed)
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+
+try:
+    from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+except ImportError:  # asgiref < 3.6, as installed with Django 4.1
+    from asyncio import iscoroutinefunction
+
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
+
+from .instrumentation import orca_profile
+
+logger = logging.getLogger("django_orca.profile")
+
+
+class OrcaProfileMiddleware:
+    """
+    Profile the orca calls made while handling each request and log a
+    summary on the "django_orca.profile" logger, at the debug level.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with orca_profile() as profile:
+            response = self.get_response(request)
+        self.log(request, profile)
+        return response
+
+    async def __acall__(self, request):
+        with orca_profile() as profile:
+            response = await self.get_response(request)
+        self.log(request, profile)
+        return response
+
+    def log(self, request, profile):
+        if not profile.calls:
+            return
+        for name, total in profile.summary().items():
+            logger.debug(
+                "%s %s: %s called %d times, %d queries, %d rows written, "
+                "%d cache hits, %d cache misses, %.3fs",
+                request.method,
+                request.path,
+                name,
+                total["calls"],
+                total["queries"],
+                total["rows"],
+                total["cache_hits"],
+                total["cache_misses"],
+                total["duration"],
+            )
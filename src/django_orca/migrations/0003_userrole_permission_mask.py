@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_orca", "0002_userrole_django_orca_role_cl_3e0010_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userrole",
+            name="permission_mask",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -1,15 +1,19 @@
-from typing import List
-
 from django.conf import settings
 from django.contrib.auth.models import Permission
-from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from django.db import models
 
 from .exceptions import RoleNotFound
-from .roles import ALLOW_MODE
-from .utils import get_permissions_list, get_roleclass, permission_to_string
+from .utils import (
+    PERMISSION_STORAGE_BITMASK,
+    PERMISSION_STORAGE_ROWS,
+    get_permission_mask,
+    get_permission_storage,
+    get_permission_template,
+    get_roleclass,
+)
 
 
 class UserRoleManager(models.Manager):
@@ -51,6 +55,9 @@ class UserRole(models.Model):
     object_id = models.PositiveIntegerField(null=True)
     obj = GenericForeignKey()
 
+    # Only maintained in bitmask permission storage.
+    permission_mask = models.BigIntegerField(default=0)
+
     objects = UserRoleManager()
 
     class Meta:
@@ -72,33 +79,22 @@ class UserRole(models.Model):
 
     def save(self, *args, **kwargs):  # pylint: disable=arguments-differ,unused-argument
         self.clean()
+        storage = get_permission_storage()
+        if storage == PERMISSION_STORAGE_BITMASK and self._state.adding:
+            self.permission_mask = get_permission_mask(self.role)
         super().save()
 
-        # non-object roles does not have specific
-        # permissions auto created.
-        if self.role.all_models:
+        # In virtual and bitmask storage, permissions are
+        # computed from the role class definition instead.
+        if storage != PERMISSION_STORAGE_ROWS:
             return
 
-        all_perms = get_permissions_list(self.role.get_models())
-
-        role_instances: List[RolePermission] = list()
-
-        for perm in all_perms:
-            perm_s = permission_to_string(perm)
-            if self.role.get_mode() == ALLOW_MODE:
-                role_instances.append(
-                    RolePermission(
-                        role=self, permission=perm, access=perm_s in self.role.allow
-                    )
-                )
-            else:
-                role_instances.append(
-                    RolePermission(
-                        role=self, permission=perm, access=perm_s not in self.role.deny
-                    )
-                )
-
-        RolePermission.objects.bulk_create(role_instances)
+        RolePermission.objects.bulk_create(
+            [
+                RolePermission(role=self, permission_id=perm_id, access=access)
+                for perm_id, access in get_permission_template(self.role).items()
+            ]
+        )
 
     def natural_key(self):
         return (self.user.id, self.role_class, self.content_type.id, self.object_id)
@@ -162,5 +158,67 @@ class RolePermission(models.Model):
     natural_key.dependencies = ["django_orca.userrole"]
 
 
+class ObjectRolesManager(models.Manager):
+    """
+    Manager of the UserRoles attached to one object.
+    """
+
+    def __init__(self, instance):
+        super().__init__()
+        self.model = UserRole
+        self.instance = instance
+
+    def _apply_rel_filters(self, queryset):
+        ct_obj = ContentType.objects.get_for_model(self.instance)
+        return queryset.filter(content_type=ct_obj.id, object_id=self.instance.pk)
+
+    def get_queryset(self):
+        try:
+            return self.instance._prefetched_objects_cache[ObjectRoles.cache_name]
+        except (AttributeError, KeyError):
+            return self._apply_rel_filters(super().get_queryset())
+
+
+class ObjectRoles:
+    """
+    Give access to the UserRoles attached to an object, and support
+    prefetch_related() of them, including with a filtered Prefetch.
+
+    A GenericRelation would not do here: RoleMixin is not a model, so its
+    fields are never contributed to the models using it.
+    """
+
+    cache_name = "roles"
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        return ObjectRolesManager(instance)
+
+    def is_cached(self, instance):
+        return self.cache_name in getattr(instance, "_prefetched_objects_cache", {})
+
+    def get_prefetch_querysets(self, instances, querysets=None):
+        queryset = querysets[0] if querysets else UserRole.objects.all()
+        ct_obj = ContentType.objects.get_for_model(instances[0])
+        queryset = queryset.filter(
+            content_type=ct_obj.id, object_id__in={obj.pk for obj in instances}
+        )
+        return (
+            queryset,
+            lambda userrole: userrole.object_id,
+            lambda obj: obj.pk,
+            False,
+            self.cache_name,
+            False,
+        )
+
+    def get_prefetch_queryset(self, instances, queryset=None):
+        # Django < 5.0
+        return self.get_prefetch_querysets(
+            instances, [queryset] if queryset is not None else None
+        )
+
+
 class RoleMixin:
-    roles = GenericRelation(UserRole)
+    roles = ObjectRoles()
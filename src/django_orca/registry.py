@@ -1,16 +1,38 @@
 import logging
 from importlib import import_module
 from inspect import getmembers
-from typing import Any, Dict, List, Type, Union
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 from django.apps import apps
+from django.contrib.auth import get_permission_codename
 from django.contrib.auth.models import Permission
 from django.db.models import Model
+from django.db.models.constants import LOOKUP_SEP
 from django.utils.module_loading import autodiscover_modules, module_has_submodule
 
 from .exceptions import AlreadyRegistered, ImproperlyConfigured
 from .roles import Role
-from .utils import is_role, orca_cache
+from .utils import (
+    PERMISSION_STORAGE_BITMASK,
+    get_check_overrides,
+    get_config,
+    get_permission_storage,
+    is_role,
+    orca_cache,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +40,51 @@ logger = logging.getLogger(__name__)
 ALLOW_MODE = 0
 DENY_MODE = 1
 
+# Permission masks are stored in a signed 64 bits integer.
+MAX_PERMISSION_BITS = 63
+
+DEFAULT_PERMISSION_PARENTS_MAX_DEPTH = 8
+
+BRANCH_DIRECT = "direct"
+BRANCH_PARENT = "parent"
+BRANCH_INHERITED = "inherited"
+
+
+class PermissionBranch(NamedTuple):
+    """
+    One way a UserRole can grant permissions on instances of a model.
+
+    "path" is the lookup from the model to the id of the object the role is
+    attached to, "model" is the model of that object and "roles" are the role
+    classes which grant permissions through this branch, by their definition
+    or by the per-assignment overrides of "set_role_permission".
+    """
+
+    kind: str
+    path: str
+    model: Type[Model]
+    roles: Tuple[Type[Role], ...]
+
+    def get_granted(
+        self, role: Type[Role], overrides: Iterable[Tuple[str, bool]] = ()
+    ) -> Set[str]:
+        """
+        Return the permissions "role" grants when attached through this branch,
+        with the (permission string, access) "overrides" of the assignment
+        applied. Overrides only cover the permissions of the role's own models,
+        so they do not apply to inherited permissions.
+        """
+        if self.kind == BRANCH_INHERITED:
+            return set(role.inherit_allow)
+
+        granted = set(role.allow)
+        for perm_s, access in overrides:
+            if access:
+                granted.add(perm_s)
+            else:
+                granted.discard(perm_s)
+        return granted
+
 
 # Get model of foreign key field with Model._meta.get_field("field_name").related_model
 class OrcaRegistry:
@@ -43,6 +110,11 @@ class OrcaRegistry:
 
     def __init__(self, name="django_orca"):
         self._registry = OrcaRegistry.RoleRegistry()
+        self._ordinals: Dict[str, Mapping[str, int]] = {}
+        self._inheritance_trees: Dict[
+            Tuple[Type[Model], int], Mapping[str, Type[Model]]
+        ] = {}
+        self._perm_conditions: Dict[Tuple[Type[Model], str, str, bool], Any] = {}
         self.name = name
         orca_cache().clear()
 
@@ -62,41 +134,197 @@ class OrcaRegistry:
             role for role in self.roles_map.values() if perm in role.inherit_allow
         ]
 
-    def _get_perm_inherits_tree(
-        self, curr: Type[Model], parents, attname
-    ) -> Dict[str, Type[Model]]:
-        parents[attname] = curr
-
-        if hasattr(curr, "RoleOptions") and hasattr(
-            curr.RoleOptions, "permission_parents"
-        ):
-            for parent in curr.RoleOptions.permission_parents:
-                field = curr._meta.get_field(parent)
-                new_attname = f"{attname}__{field.name}"
-                if new_attname not in parents:
-                    parents.update(
-                        self._get_perm_inherits_tree(
-                            field.related_model, parents, new_attname
-                        )
-                    )
-
-        return parents
-
-    def get_perm_inheritance_tree(self, model: Type[Model]) -> Dict[str, Type[Model]]:
-        accessors: Dict[str, Type[Model]] = {}
-
-        if hasattr(model, "RoleOptions") and hasattr(
-            model.RoleOptions, "permission_parents"
-        ):
-            for parent in model.RoleOptions.permission_parents:
-                field = model._meta.get_field(parent)
-                attname = field.name
-                accessors.update(
-                    self._get_perm_inherits_tree(
-                        field.related_model, accessors, attname
-                    )
+    def get_role_permissions(self, role: Type[Role]) -> List[str]:
+        """
+        Return the permissions of the role's models, as declared by their Meta,
+        in the order of "models".
+        """
+        permissions: List[str] = []
+        if not role.all_models:
+            for model in role.get_models():
+                opts = model._meta
+                codenames = [
+                    get_permission_codename(action, opts)
+                    for action in opts.default_permissions
+                ] + [codename for codename, _ in opts.permissions]
+                permissions.extend(
+                    f"{opts.app_label}.{codename}" for codename in codenames
+                )
+        return permissions
+
+    def get_permission_ordinals(self, role: Type[Role]) -> Mapping[str, int]:
+        """
+        Return the bit used by every permission of the role's models in a
+        permission mask. Ordinals follow the order of "models" and of the
+        permissions of each model, so appending a model or a permission keeps
+        the existing ones stable.
+        """
+        name = role.get_class_name()
+        if name not in self._ordinals:
+            ordinals: Dict[str, int] = {}
+            for perm in self.get_role_permissions(role):
+                ordinals.setdefault(perm, len(ordinals))
+
+            if len(ordinals) > MAX_PERMISSION_BITS:
+                raise ImproperlyConfigured(
+                    'The role "%s" covers %d permissions, but a permission mask '
+                    "holds at most %d." % (name, len(ordinals), MAX_PERMISSION_BITS)
+                )
+            self._ordinals[name] = MappingProxyType(ordinals)
+
+        return self._ordinals[name]
+
+    def get_perm_inheritance_tree(
+        self, model: Type[Model]
+    ) -> Mapping[str, Type[Model]]:
+        """
+        Return the lookups from "model" to every model it inherits permissions
+        from through "RoleOptions.permission_parents", parents first.
+
+        The tree is computed once per model. Paths longer than the
+        PERMISSION_PARENTS_MAX_DEPTH setting are cut. Self-referential or
+        cyclic parents raise ImproperlyConfigured.
+        """
+        max_depth = get_config(
+            "PERMISSION_PARENTS_MAX_DEPTH", DEFAULT_PERMISSION_PARENTS_MAX_DEPTH
+        )
+        key = (model, max_depth)
+        if key not in self._inheritance_trees:
+            accessors: Dict[str, Type[Model]] = {}
+            self._walk_perm_parents(model, "", (model,), max_depth, accessors)
+            self._inheritance_trees[key] = MappingProxyType(accessors)
+
+        return self._inheritance_trees[key]
+
+    def _walk_perm_parents(
+        self,
+        curr: Type[Model],
+        prefix: str,
+        visited: Tuple[Type[Model], ...],
+        max_depth: int,
+        accessors: Dict[str, Type[Model]],
+    ):
+        options = getattr(curr, "RoleOptions", None)
+        for parent in getattr(options, "permission_parents", ()):
+            field = curr._meta.get_field(parent)
+            attname = f"{prefix}{LOOKUP_SEP}{field.name}" if prefix else field.name
+            if field.related_model in visited:
+                raise ImproperlyConfigured(
+                    'The permission parents of "%s" form a cycle at "%s".'
+                    % (visited[0]._meta.label, attname)
                 )
-        return accessors
+
+            if len(visited) > max_depth:
+                logger.warning(
+                    'The permission parents of "%s" are deeper than %d levels, '
+                    'ignoring "%s".',
+                    visited[0]._meta.label,
+                    max_depth,
+                    attname,
+                )
+                continue
+
+            accessors[attname] = field.related_model
+            self._walk_perm_parents(
+                field.related_model,
+                attname,
+                visited + (field.related_model,),
+                max_depth,
+                accessors,
+            )
+
+    def clear_cache(self):
+        """
+        Forget the permission ordinals, inheritance trees and permission
+        conditions computed so far.
+        """
+        self._ordinals.clear()
+        self._inheritance_trees.clear()
+        self._perm_conditions.clear()
+
+    def get_perm_condition(self, model: Type[Model], permission: str):
+        """
+        Return the PermissionCondition of "permission" on the objects of
+        "model", compiled once per permission storage until the cache is
+        cleared. It only holds the branches granting "permission", the queries
+        are built every time it is bound to a user.
+        """
+        from .auth.getters import compile_perm_condition
+
+        key = (model, permission, get_permission_storage(), get_check_overrides())
+        if key not in self._perm_conditions:
+            self._perm_conditions[key] = compile_perm_condition(model, permission)
+
+        return self._perm_conditions[key]
+
+    def get_permission_branches(
+        self, model: Type[Model], permission: Optional[str] = None
+    ) -> List[PermissionBranch]:
+        """
+        Return the branches through which a UserRole grants "permission" on
+        instances of "model". If "permission" is not provided, every branch
+        granting any permission is returned.
+
+        Roles with "all_models" are never attached to an object, so they never
+        take part in a branch. When the overrides of "set_role_permission" are
+        checked, the roles attached to "model" or to one of its parents take
+        part in the branch whenever an override can grant them "permission",
+        even if their definition does not.
+        """
+        check_overrides = get_check_overrides()
+        bitmask = get_permission_storage() == PERMISSION_STORAGE_BITMASK
+
+        def grants(perms: Iterable[str]) -> bool:
+            return permission in perms if permission else bool(perms)
+
+        def grants_or_overrides(role: Type[Role]) -> bool:
+            if grants(role.allow):
+                return True
+            if not check_overrides:
+                return False
+            # The bits of the permission masks only exist in bitmask storage.
+            if bitmask:
+                return grants(list(self.get_permission_ordinals(role)))
+            return grants(self.get_role_permissions(role))
+
+        roles = [role for role in self.roles_map.values() if not role.all_models]
+        parent_list = model._meta.get_parent_list()
+        branches: List[PermissionBranch] = []
+
+        direct = tuple(
+            role
+            for role in roles
+            if grants_or_overrides(role) and role.is_my_model(model)
+        )
+        if direct:
+            branches.append(PermissionBranch(BRANCH_DIRECT, "pk", model, direct))
+
+        for parent in parent_list:
+            parent_roles = tuple(
+                role
+                for role in roles
+                if role.follow_model_inheritance
+                and grants_or_overrides(role)
+                and parent in role.models
+            )
+            if parent_roles:
+                path = model._meta.get_ancestor_link(parent).attname
+                branches.append(
+                    PermissionBranch(BRANCH_PARENT, path, parent, parent_roles)
+                )
+
+        for path, parent in self.get_perm_inheritance_tree(model).items():
+            inherit_roles = tuple(
+                role
+                for role in roles
+                if grants(role.inherit_allow) and parent in role.models
+            )
+            if inherit_roles:
+                branches.append(
+                    PermissionBranch(BRANCH_INHERITED, path, parent, inherit_roles)
+                )
+
+        return branches
 
     def register(self, kls):
         if not is_role(kls):
@@ -119,7 +347,14 @@ class OrcaRegistry:
             )
 
         self.__validate(kls)
+        # The permission parents are checked, for cycles in particular, once
+        # the models are loaded rather than on the first permission check.
+        for model in apps.get_models():
+            self.get_perm_inheritance_tree(model)
+        kls.compile_models()
         self._registry[kls.get_class_name()] = kls
+        self._perm_conditions.clear()
+        self._ordinals.pop(kls.get_class_name(), None)
         try:
             del self.get_roles_for_perm
             del self.get_inheritance_roles_for_perm
@@ -0,0 +1,52 @@
+from rest_framework import serializers
+
+from django_orca.loaders import get_permission_loader
+
+
+class ObjectPermissionsField(serializers.Field):
+    """
+    Read-only field listing the actions the request user is allowed on the
+    object, e.g. ["change", "view"] for "main.change_course" and
+    "main.view_course".
+
+    The permissions come from the request-scoped PermissionLoader. In a list,
+    the loader is primed with every object of the list, so serializing it costs
+    a single permission query whatever its length.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get("request")
+        assert request is not None, (
+            "`%s` requires the request in the serializer context. Add "
+            "`context={'request': request}` when instantiating the serializer."
+            % self.__class__.__name__
+        )
+        loader = get_permission_loader(request)
+
+        list_serializer = getattr(self.parent, "parent", None)
+        if isinstance(list_serializer, serializers.ListSerializer) and not getattr(
+            list_serializer, "_orca_primed", False
+        ):
+            loader.prime(list_serializer.instance or ())
+            list_serializer._orca_primed = True
+
+        return sorted(
+            self.get_action(value, permission) for permission in loader.load(value)
+        )
+
+    def get_action(self, obj, permission: str) -> str:
+        """
+        Return the action of "permission", its codename without the name of the
+        model of "obj" or of one of its parents.
+        """
+        codename = permission.split(".")[-1]
+        for model in (obj._meta.model, *obj._meta.get_parent_list()):
+            suffix = "_" + model._meta.model_name
+            if codename.endswith(suffix):
+                return codename[: -len(suffix)]
+        return codename
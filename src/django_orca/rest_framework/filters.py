@@ -1,13 +1,27 @@
 from typing import Optional
 
+from django.contrib.auth.models import AnonymousUser
 from rest_framework.filters import BaseFilterBackend
 
-from django_orca.auth.getters import get_perm_qs_for_user
+from django_orca.auth.getters import PermissionCondition, filter_perm_qs_for_user
+from django_orca.registry import registry
 
 
 class ObjectRolePermissionsFilter(BaseFilterBackend):
+    """
+    Narrow the queryset of the view down to the objects the request user has
+    "permission_name" on. The condition is added to the queryset, so its
+    filters, select_related, prefetch_related and only() are kept. Active
+    superusers see the whole queryset.
+    """
+
     permission_name: Optional[str] = None
 
+    # Resolve the branches granting the permission once per model and
+    # permission, instead of on every request. The compiled conditions are
+    # dropped by registry.clear_cache().
+    compiled_condition = False
+
     def get_permission_name(self, queryset) -> str:
         if self.permission_name is not None:
             return self.permission_name
@@ -20,8 +34,20 @@ class ObjectRolePermissionsFilter(BaseFilterBackend):
             model_name = queryset.model._meta.model_name
             return f"{app_label}.view_{model_name}"
 
+    def get_condition(self, queryset, view) -> PermissionCondition:
+        return registry.get_perm_condition(
+            queryset.model, self.get_permission_name(queryset)
+        )
+
     def filter_queryset(self, request, queryset, view):
         user = request.user
-        perm_name = self.get_permission_name(queryset)
+        if user.is_active and getattr(user, "is_superuser", False):
+            return queryset
+        if not self.compiled_condition:
+            return filter_perm_qs_for_user(
+                queryset, user, self.get_permission_name(queryset)
+            )
 
-        return get_perm_qs_for_user(user, queryset.model, perm_name)
+        if isinstance(user, AnonymousUser):
+            return queryset.none()
+        return queryset.filter(self.get_condition(queryset, view).for_user(user))
@@ -0,0 +1,111 @@
+from django.http import Http404
+from rest_framework import exceptions
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+from django_orca.loaders import get_permission_loader
+
+
+class ObjectRolePermissions(BasePermission):
+    """
+    Check the object permissions granted by the orca roles of the request user,
+    like DRF's DjangoObjectPermissions but with every permission of an object
+    resolved in one query. The permissions are kept for the rest of the
+    request, and the objects serialized by "PermissionLoaderMixin" are all
+    resolved in a single query.
+
+    The methods of "model_perms_map" are not bound to an object, so they need
+    the model-level permissions of the user instead. Active superusers are let
+    through everywhere.
+    """
+
+    perms_map = {
+        "GET": ["%(app_label)s.view_%(model_name)s"],
+        "OPTIONS": ["%(app_label)s.view_%(model_name)s"],
+        "HEAD": ["%(app_label)s.view_%(model_name)s"],
+        "POST": ["%(app_label)s.add_%(model_name)s"],
+        "PUT": ["%(app_label)s.change_%(model_name)s"],
+        "PATCH": ["%(app_label)s.change_%(model_name)s"],
+        "DELETE": ["%(app_label)s.delete_%(model_name)s"],
+    }
+
+    model_perms_map = {
+        "POST": ["%(app_label)s.add_%(model_name)s"],
+    }
+
+    def get_required_object_permissions(self, method, model_cls):
+        kwargs = {
+            "app_label": model_cls._meta.app_label,
+            "model_name": model_cls._meta.model_name,
+        }
+        if method not in self.perms_map:
+            raise exceptions.MethodNotAllowed(method)
+        return [perm % kwargs for perm in self.perms_map[method]]
+
+    def get_required_model_permissions(self, method, model_cls):
+        kwargs = {
+            "app_label": model_cls._meta.app_label,
+            "model_name": model_cls._meta.model_name,
+        }
+        return [perm % kwargs for perm in self.model_perms_map.get(method, [])]
+
+    def get_model(self, view, obj=None):
+        # The permissions of a multi-table inheritance child are the ones of the
+        # model the view is declared for, as in the role definitions.
+        queryset = getattr(view, "queryset", None)
+        if hasattr(view, "get_queryset"):
+            queryset = view.get_queryset()
+        if queryset is not None:
+            return queryset.model
+        return obj._meta.model
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        if user.is_active and user.is_superuser:
+            return True
+
+        perms = self.get_required_model_permissions(
+            request.method, self.get_model(view)
+        )
+        return user.has_perms(perms)
+
+    def has_object_permission(self, request, view, obj):
+        if request.user.is_active and request.user.is_superuser:
+            return True
+
+        model_cls = self.get_model(view, obj)
+        granted = get_permission_loader(request).load(obj)
+
+        perms = self.get_required_object_permissions(request.method, model_cls)
+        if granted.issuperset(perms):
+            return True
+
+        # As DjangoObjectPermissions does, users who cannot even read the object
+        # get a 404 rather than a 403, so its existence is not disclosed.
+        if request.method in SAFE_METHODS:
+            raise Http404
+
+        read_perms = self.get_required_object_permissions("GET", model_cls)
+        if not granted.issuperset(read_perms):
+            raise Http404
+
+        return False
+
+
+class PermissionLoaderMixin:
+    """
+    Viewset mixin priming the permission loader of the request with the objects
+    of every list it serializes, so checking or serializing their permissions
+    costs one query for the whole page.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get("many") and args:
+            instances = args[0]
+            if not isinstance(instances, list):
+                # Evaluate the QuerySet once, for the loader and the serializer.
+                instances = list(instances)
+                args = (instances, *args[1:])
+            get_permission_loader(self.request).prime(instances)
+        return super().get_serializer(*args, **kwargs)
@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import List, Type, Union
+from typing import FrozenSet, List, Optional, Type, Union
 
 from django.apps import apps
 from django.db.models import Model
@@ -36,6 +36,8 @@ class Role(ABC):
     MODE = ALLOW_MODE
     INHERIT_MODE = ALLOW_MODE
 
+    _my_models: Optional[FrozenSet[Type[Model]]]
+
     def __new__(cls, *args, **kwargs):  # pylint: disable=unused-argument
         raise ImproperlyConfigured("Role classes must not be instantiated.")
 
@@ -75,17 +77,31 @@ class Role(ABC):
             return list(apps.get_models())  # All models known by Django.
         return list(cls.models)
 
+    @classmethod
+    def compile_models(cls):
+        """
+        Precompute the set of models the role can be attached to, so that
+        "is_my_model" is a single set lookup. With "follow_model_inheritance",
+        the models inheriting from one of "models" are included.
+        Called by the registry when the role is registered.
+        """
+        cls.__protect()
+        my_models: Optional[FrozenSet[Type[Model]]] = None
+        if not cls.all_models:
+            my_models = frozenset(cls.models)
+            if cls.follow_model_inheritance:
+                my_models |= frozenset(
+                    model
+                    for model in apps.get_models()
+                    if not my_models.isdisjoint(model._meta.get_parent_list())
+                )
+        cls._my_models = my_models
+
     @classmethod
     def is_my_model(cls, model):
         cls.__protect()
-        if cls.follow_model_inheritance:
-            if model._meta.model in cls.get_models():
-                return True
-
-            for parent, _ in model._meta.parents.items():
-                if parent in cls.get_models():
-                    return True
-        else:
-            return (
-                model._meta.model in cls.get_models()
-            )  # pylint: disable=protected-access
+        if "_my_models" not in cls.__dict__:
+            cls.compile_models()
+        if cls._my_models is None:
+            return True
+        return model._meta.model in cls._my_models
@@ -1,22 +1,51 @@
 """ permissions shortcuts """
 
-from .auth.checkers import has_permission, has_role
+from .auth.checkers import ahas_permission, ahas_role, has_permission, has_role
 from .auth.getters import (
+    aget_permissions_for_object,
+    aget_user_roles_strings,
+    aget_userroles,
+    annotate_permissions,
+    filter_perm_qs_for_user,
     get_objects,
+    get_permissions_for_object,
+    get_permissions_for_objects,
     get_permissions_from_roles,
     get_qs_for_user,
+    get_user_ids_with_permission,
     get_user_roles_strings,
     get_userroles,
     get_users,
+    get_users_with_permission,
+    iter_objects,
+    prefetch_user_roles,
+)
+from .auth.setters import (
+    aassign_role,
+    aassign_roles,
+    aremove_role,
+    aremove_roles,
+    assign_role,
+    assign_roles,
+    remove_role,
+    remove_roles,
+    set_role_permission,
 )
-from .auth.setters import assign_role, assign_roles, remove_role, remove_roles
 
 __all__ = [
     "get_users",
+    "get_users_with_permission",
+    "get_user_ids_with_permission",
     "get_userroles",
     "get_objects",
+    "iter_objects",
     "get_qs_for_user",
+    "filter_perm_qs_for_user",
+    "annotate_permissions",
+    "prefetch_user_roles",
     "get_user_roles_strings",
+    "get_permissions_for_object",
+    "get_permissions_for_objects",
     "get_permissions_from_roles",
     "has_role",
     "has_permission",
@@ -24,4 +53,14 @@ __all__ = [
     "assign_roles",
     "remove_role",
     "remove_roles",
+    "set_role_permission",
+    "aget_userroles",
+    "aget_user_roles_strings",
+    "aget_permissions_for_object",
+    "ahas_role",
+    "ahas_permission",
+    "aassign_role",
+    "aassign_roles",
+    "aremove_role",
+    "aremove_roles",
 ]
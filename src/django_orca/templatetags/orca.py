@@ -0,0 +1,70 @@
+from django import template
+from django.db import models
+
+from django_orca.auth.getters import get_permissions_for_object
+from django_orca.loaders import PermissionLoader, get_permission_loader
+
+register = template.Library()
+
+
+def get_context_loader(context) -> PermissionLoader:
+    """
+    Return the PermissionLoader of the user being rendered for: the one of the
+    request when it is in the context, else one kept for the current render.
+
+    On first use, the loader is primed with the "object_list" of the context,
+    so the permissions of the objects of a list view are resolved together.
+    """
+    request = context.get("request")
+    if request is not None:
+        loader = get_permission_loader(request)
+    else:
+        loader = context.render_context.get("orca_permission_loader")
+        if loader is None:
+            loader = PermissionLoader(context.get("user"))
+            context.render_context["orca_permission_loader"] = loader
+
+    if not context.render_context.get("orca_primed"):
+        context.render_context["orca_primed"] = True
+        object_list = context.get("object_list")
+        if object_list is not None:
+            loader.prime(obj for obj in object_list if isinstance(obj, models.Model))
+    return loader
+
+
+@register.simple_tag(takes_context=True)
+def has_perm(context, permission, obj) -> bool:
+    """
+    Tell whether the user has "permission" on "obj" through their roles:
+
+        {% has_perm "main.change_course" course as can_edit %}
+    """
+    return get_context_loader(context).has_perm(obj, permission)
+
+
+@register.simple_tag(takes_context=True)
+def prime_permissions(context, objs) -> str:
+    """
+    Collect "objs", so that the permissions of all of them are resolved in one
+    query by the first tag or filter needing one:
+
+        {% prime_permissions courses %}
+        {% for course in courses %}{% has_perm ... %}{% endfor %}
+    """
+    get_context_loader(context).prime(objs)
+    return ""
+
+
+@register.filter
+def user_permissions(obj, request_or_user):
+    """
+    Return the set of permissions of the user of the request on "obj":
+
+        {% if "main.change_course" in course|user_permissions:request %}
+
+    Given the request, the lookups are batched with the ones of the tags.
+    Given a user, every lookup costs a query.
+    """
+    if hasattr(request_or_user, "user") and hasattr(request_or_user, "method"):
+        return get_permission_loader(request_or_user).load(obj)
+    return get_permissions_for_object(request_or_user, obj)
@@ -1,17 +1,30 @@
 import inspect
+import json
 import logging
+from hashlib import md5
 from typing import Optional, Type
 
 from django.core.cache.backends.base import BaseCache
+from django.db import DEFAULT_DB_ALIAS, connections
 
 from django_orca.roles import Role
 
 from .exceptions import ImproperlyConfigured, NotAllowed, ParentNotFound, RoleNotFound
+from .instrumentation import instrument, record_cache_access
 
 logger = logging.getLogger(__name__)
 
 CACHE_KEY_PREFIX = "orca"
 
+# RolePermission rows are written for every permission of every assignment.
+PERMISSION_STORAGE_ROWS = "rows"
+# RolePermission rows are only written for per-instance overrides, the rest
+# is computed from the role class definition.
+PERMISSION_STORAGE_VIRTUAL = "virtual"
+# Like virtual storage, but the effective permissions of every assignment are
+# also kept as a bitmask in UserRole.permission_mask.
+PERMISSION_STORAGE_BITMASK = "bitmask"
+
 
 def is_role(role_class):
     """
@@ -41,6 +54,32 @@ def get_config(key, default):
     return default
 
 
+def get_permission_storage():
+    """
+    Return how the permissions of role assignments are stored.
+    """
+    storage = get_config("PERMISSION_STORAGE", PERMISSION_STORAGE_ROWS)
+    if storage not in (
+        PERMISSION_STORAGE_ROWS,
+        PERMISSION_STORAGE_VIRTUAL,
+        PERMISSION_STORAGE_BITMASK,
+    ):
+        raise ImproperlyConfigured(
+            '"%s" is not a valid value for PERMISSION_STORAGE.' % storage
+        )
+    return storage
+
+
+def get_check_overrides():
+    """
+    Tell whether permission checks apply the per-assignment overrides of "set_role_permission".
+    In rows storage every assignment has a RolePermission row per permission, so they are only looked up with "CHECK_OVERRIDES": checks otherwise follow the role definition alone.
+    """
+    if get_permission_storage() != PERMISSION_STORAGE_ROWS:
+        return True
+    return bool(get_config("CHECK_OVERRIDES", False))
+
+
 def get_roleclass(role_class) -> Type[Role]:
     """
     Get the role class signature by string or by itself.
@@ -64,6 +103,7 @@ def string_to_permission(perm):
     prefix = get_config("CACHE_PREFIX_KEY", CACHE_KEY_PREFIX)
     key = "{}-permission-{}".format(prefix, perm)
     perm_obj: Optional[Permission] = orca_cache().get(key)
+    record_cache_access(perm_obj is not None)
 
     # If not, creates the query to
     # get the Permission instance
@@ -104,6 +144,151 @@ def get_permissions_list(models_list):
     return list(Permission.objects.filter(content_type_id__in=ct_ids))
 
 
+def get_permission_template(role, using=None):
+    """
+    Return a dictionary mapping the id of every Permission of the role's models to the access a RolePermission of this role should have.
+    If "using" is provided, the Permissions are read from that database and the orca cache, which holds the ids of the default database, is left out.
+    """
+    # non-object roles does not have specific
+    # permissions auto created.
+    if role.all_models:
+        return {}
+
+    if using is not None:
+        return _build_permission_template(role, using)
+
+    # Checking if the template exists in the cache system.
+    key = _get_definition_key("template", role)
+    template = orca_cache().get(key)
+    record_cache_access(template is not None)
+
+    if template is None:
+        template = _build_permission_template(role, DEFAULT_DB_ALIAS)
+        orca_cache().set(key, template)
+
+    return dict(template)
+
+
+def _get_definition_key(name, role):
+    """
+    Return the cache key of "name" for the role. The key covers the role
+    definition, so changing the role class does not return stale data.
+    """
+    definition = repr(
+        (
+            role.get_class_name(),
+            [model._meta.label for model in role.get_models()],
+            role.get_mode(),
+            role.allow,
+            role.deny,
+        )
+    )
+    prefix = get_config("CACHE_PREFIX_KEY", CACHE_KEY_PREFIX)
+    return "{}-{}-{}".format(prefix, name, md5(definition.encode("utf-8")).hexdigest())
+
+
+def _build_permission_template(role, using):
+    from django.contrib.auth.models import Permission
+    from django.contrib.contenttypes.models import ContentType
+
+    from .roles import ALLOW_MODE
+
+    ct_list = ContentType.objects.db_manager(using).get_for_models(*role.get_models())
+    perms = (
+        Permission.objects.using(using)
+        .filter(content_type__in=ct_list.values())
+        .values_list("id", "content_type__app_label", "codename")
+    )
+
+    template = dict()
+    for perm_id, app_label, codename in perms:
+        perm_s = "%s.%s" % (app_label, codename)
+        if role.get_mode() == ALLOW_MODE:
+            template[perm_id] = perm_s in role.allow
+        else:
+            template[perm_id] = perm_s not in role.deny
+    return template
+
+
+def get_permission_ids(role):
+    """
+    Return a dictionary mapping every permission string of the role's models to the id of its Permission, fetched in a single query and kept in the cache.
+    """
+    from django.contrib.auth.models import Permission
+    from django.contrib.contenttypes.models import ContentType
+
+    if role.all_models:
+        return {}
+
+    key = _get_definition_key("permission-ids", role)
+    ids = orca_cache().get(key)
+    record_cache_access(ids is not None)
+
+    if ids is None:
+        ct_list = ContentType.objects.get_for_models(*role.get_models())
+        perms = Permission.objects.filter(
+            content_type__in=ct_list.values()
+        ).values_list("id", "content_type__app_label", "codename")
+        ids = {
+            "%s.%s" % (app_label, codename): perm_id
+            for perm_id, app_label, codename in perms
+        }
+        orca_cache().set(key, ids)
+
+    return ids
+
+
+def get_role_accesses(role_s, accesses):
+    """
+    Return the (permission id, access) pairs of a role assignment given the pairs of its stored RolePermission rows.
+    In virtual storage, the stored rows only override the role class definition.
+    """
+    if get_permission_storage() == PERMISSION_STORAGE_ROWS:
+        return accesses
+
+    try:
+        template = get_permission_template(get_roleclass(role_s))
+    except RoleNotFound:
+        template = {}
+    template.update(accesses)
+    return list(template.items())
+
+
+def get_permission_mask(role, overrides=()):
+    """
+    Return the permission mask of a role assignment: the bits of the permissions granted by the role class, with the (permission string, access) "overrides" applied.
+    """
+    from .registry import registry
+    from .roles import ALLOW_MODE
+
+    ordinals = registry.get_permission_ordinals(role)
+
+    mask = 0
+    for perm_s, ordinal in ordinals.items():
+        if role.get_mode() == ALLOW_MODE:
+            access = perm_s in role.allow
+        else:
+            access = perm_s not in role.deny
+        if access:
+            mask |= 1 << ordinal
+
+    for perm_s, access in overrides:
+        if perm_s in ordinals:
+            bit = 1 << ordinals[perm_s]
+            mask = mask | bit if access else mask & ~bit
+    return mask
+
+
+def get_mask_accesses(role, mask):
+    """
+    Return the (permission string, access) pairs encoded in a permission mask.
+    """
+    from .registry import registry
+
+    ordinals = registry.get_permission_ordinals(role)
+    return [(perm_s, bool(mask >> ordinal & 1)) for perm_s, ordinal in ordinals.items()]
+
+
 def get_parents(model):
     """
     Return the list of instances refered as "parents" of a given model instance.
@@ -158,6 +343,7 @@ def inherit_check(role_s, permission):
     return False
 
 
+@instrument
 def cleanup_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
     """
     This function is attached to the post_delete signal of all models of Django. Used to remove useless role instances and permissions.
@@ -202,6 +388,25 @@ def check_my_model(role, obj):
         )
 
 
+async def aensure_content_types(*models):
+    """
+    Make sure the ContentTypes of "models" are in the ContentType cache, so that
+    building querysets for them does not query the database from an async context.
+    """
+    from asgiref.sync import sync_to_async
+    from django.contrib.contenttypes.models import ContentType
+
+    missing = []
+    for model in models:
+        try:
+            ContentType.objects._get_from_cache(model._meta.concrete_model._meta)
+        except KeyError:
+            missing.append(model)
+
+    if missing:
+        await sync_to_async(ContentType.objects.get_for_models)(*missing)
+
+
 ##############################
 ###      CACHE UTILS       ###
 ##############################
@@ -222,8 +427,6 @@ def generate_cache_key(user, obj, any_object):
     """
     Generate a md5 digest based on the string representation of the user and the object passed via arguments.
     """
-    from hashlib import md5
-
     key = md5()
     str_key = str(user.__class__) + str(user) + str(user.id)
     if obj:
@@ -247,6 +450,14 @@ def delete_from_cache(user, obj):
     orca_cache().delete(key)
 
 
+async def adelete_from_cache(user, obj):
+    """
+    Async version of "delete_from_cache".
+    """
+    await orca_cache().adelete(generate_cache_key(user, obj, any_object=False))
+    await orca_cache().adelete(generate_cache_key(user, obj=None, any_object=True))
+
+
 def get_from_cache(user, obj, any_object):
     """
     Get all permissions data about the user and the object passed via arguments e store it in the Django cache system.
@@ -260,8 +471,9 @@ def get_from_cache(user, obj, any_object):
 
     # Check for the cached data.
     data = orca_cache().get(key)
+    record_cache_access(data is not None)
     if data is None:
-        query = UserRole.objects.prefetch_related("accesses").filter(user=user)
+        query = UserRole.objects.filter(user=user)
 
         # Filtering by object.
         if obj:
@@ -272,19 +484,36 @@ def get_from_cache(user, obj, any_object):
                 object_id__isnull=True
             )
 
-        # Getting only the required values.
-        query = query.values_list(
-            "role_class", "accesses__permission", "accesses__access"
-        )
-
         # Transform the query result into
         # a dictionary.
         data = dict()
-        for item in query:
-            perms_list = data.get(item[0], [])
-            if item[0] and item[1]:
-                perms_list.append((item[1], item[2]))
-            data[item[0]] = perms_list
+        if get_permission_storage() == PERMISSION_STORAGE_BITMASK:
+            # Decoding the masks, without touching the accesses.
+            for role_s, mask in query.values_list("role_class", "permission_mask"):
+                role = get_roleclass(role_s)
+                perm_ids = get_permission_ids(role)
+                perms_list = data.get(role_s, [])
+                for perm_s, access in get_mask_accesses(role, mask):
+                    # Permissions of the models' Meta which are not migrated
+                    # yet have no id.
+                    if perm_s in perm_ids:
+                        perms_list.append((perm_ids[perm_s], access))
+                data[role_s] = perms_list
+        else:
+            # Getting only the required values.
+            query = query.values_list(
+                "role_class", "accesses__permission", "accesses__access"
+            )
+            for item in query:
+                perms_list = data.get(item[0], [])
+                if item[0] and item[1]:
+                    perms_list.append((item[1], item[2]))
+                data[item[0]] = perms_list
+
+            data = {
+                role_s: get_role_accesses(role_s, perms_list)
+                for role_s, perms_list in data.items()
+            }
 
         # Ordering the tuple by their Role Ranking values.
         data = sorted(data.items(), key=lambda role: get_roleclass(role[0]).ranking)
@@ -297,3 +526,14 @@ def get_from_cache(user, obj, any_object):
         orca_cache().set(key, data)
 
     return data
+
+
+def estimate_count(qs) -> Optional[int]:
+    """
+    Return the number of rows the query planner expects "qs" to return, or None
+    if the database does not report it in a form independent of its version.
+    """
+    if connections[qs.db].vendor != "postgresql":
+        return None
+    plan = json.loads(qs.explain(format="json"))
+    return plan[0]["Plan"]["Plan Rows"]
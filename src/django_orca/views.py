@@ -1,38 +1,40 @@
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Iterable
-from typing import Type
+from typing import Optional, Type
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.contrib import auth
 from django.contrib.auth.mixins import AccessMixin
-from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import (
+    ImproperlyConfigured,
+    PermissionDenied,
+    ValidationError,
+)
 from django.http import Http404
 
+from django_orca.auth.getters import filter_perm_qs_for_user, get_perm_exists
 from django_orca.roles import Role
-from django_orca.shortcuts import has_role
+from django_orca.shortcuts import ahas_role, has_role
+from django_orca.utils import CACHE_KEY_PREFIX, estimate_count, get_config, orca_cache
 
 
-class ObjectPermissionRequiredMixin(AccessMixin):
+class PermissionObjectMixin(AccessMixin):
     """
-    PermissionMixin
+    Find the object the access is checked on and deny the request unless
+    "has_permission" returns True.
 
-    This checks whether the accessor has the specified permission(s) on the referenced object
+    The object fetched for the check through "get_object" is kept by
+    "get_permission_object", and returned by later calls to "get_object", so
+    the view does not fetch it again.
     """
 
     login_url = settings.LOGIN_URL
-    permission_required: str | Iterable[str]
     return_404 = False
-
-    def get_permission_required(self):
-        if self.permission_required:
-            if isinstance(self.permission_required, str):
-                return [self.permission_required]
-            else:
-                return self.permission_required
-
-        raise ImproperlyConfigured(
-            "Provide a 'permission_required' attribute."
-        )  # pragma: no cover
+    _permission_object = None
 
     def get_permission_object(self):
         if hasattr(self, "permission_object"):
@@ -43,17 +45,28 @@ class ObjectPermissionRequiredMixin(AccessMixin):
                 return object
 
         elif hasattr(self, "get_object"):
-            return getattr(self, "get_object")()
+            if self._permission_object is None:
+                self._permission_object = self.get_object()
+            return self._permission_object
 
         raise ImproperlyConfigured(  # pragma: no cover
             "Provide a 'permission_object' attribute or implement "
             "a 'get_permission_object' method."
         )
 
+    def get_object(self, queryset=None):
+        if queryset is None and self._permission_object is not None:
+            return self._permission_object
+
+        if not hasattr(super(), "get_object"):
+            raise ImproperlyConfigured(  # pragma: no cover
+                "Provide a 'permission_object' attribute or implement "
+                "a 'get_permission_object' method."
+            )
+        return super().get_object(queryset)
+
     def has_permission(self):
-        return self.request.user.has_perms(
-            self.get_permission_required(), self.get_permission_object()
-        )
+        raise NotImplementedError  # pragma: no cover
 
     def dispatch(self, request, *args, **kwargs):
         if not self.has_permission():
@@ -65,10 +78,61 @@ class ObjectPermissionRequiredMixin(AccessMixin):
             return super().dispatch(request, *args, **kwargs)
 
 
-class ObjectRoleRequiredMixin(AccessMixin):
-    login_url = settings.LOGIN_URL
+class ObjectPermissionRequiredMixin(PermissionObjectMixin):
+    """
+    PermissionMixin
+
+    This checks whether the accessor has the specified permission(s) on the referenced object
+
+    With "fuse_permission_check", the permissions are checked by the query
+    fetching the object from "get_queryset", so the object and the access to
+    it cost a single query. A missing object still gives a 404 and a denied
+    access a 403, or a 404 with "return_404".
+    """
+
+    permission_required: str | Iterable[str]
+    fuse_permission_check = False
+
+    def get_permission_required(self):
+        if self.permission_required:
+            if isinstance(self.permission_required, str):
+                return [self.permission_required]
+            else:
+                return self.permission_required
+
+        raise ImproperlyConfigured(
+            "Provide a 'permission_required' attribute."
+        )  # pragma: no cover
+
+    def has_permission(self):
+        if self.fuse_permission_check:
+            return self.has_fused_permission()
+
+        return self.request.user.has_perms(
+            self.get_permission_required(), self.get_permission_object()
+        )
+
+    def has_fused_permission(self):
+        user = self.request.user
+        if isinstance(user, AnonymousUser):
+            self.get_permission_object()
+            return False
+        if user.is_active and user.is_superuser:
+            self.get_permission_object()
+            return True
+
+        queryset = self.get_queryset()
+        flags = {
+            f"orca_perm_{index}": get_perm_exists(user, queryset.model, perm)
+            for index, perm in enumerate(self.get_permission_required())
+        }
+        obj = self.get_object(queryset.annotate(**flags))
+        self._permission_object = obj
+        return all(getattr(obj, flag) for flag in flags)
+
+
+class ObjectRoleRequiredMixin(PermissionObjectMixin):
     role_required: Type[Role]
-    return_404 = False
 
     def get_role_required(self):
         if self.role_required:
@@ -78,7 +142,153 @@ class ObjectRoleRequiredMixin(AccessMixin):
             "Provide a 'role_required' attribute."
         )  # pragma: no cover
 
-    def get_permission_object(self):
+    def has_permission(self):
+        return has_role(
+            self.request.user, self.get_role_required(), self.get_permission_object()
+        )
+
+
+# How ObjectPermissionListMixin counts the objects for the paginator.
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATED = "estimated"
+
+
+class ObjectPermissionListMixin:
+    """
+    List counterpart of ObjectPermissionRequiredMixin, for views based on
+    MultipleObjectMixin such as ListView: only the objects on which the user has
+    all of "permission_required" are listed. The condition is added to the
+    queryset of the view, so its filters and related lookups are kept.
+
+    With "keyset_field", the list is paginated by the value of that unique
+    field instead of by page number: each page starts after the "cursor_kwarg"
+    GET parameter and the context gets the "next_cursor" of the next page. No
+    count is run and deep pages cost as much as the first one.
+
+    Otherwise, "count_strategy" chooses how the paginator counts the objects:
+    exactly on every request, from the orca cache for "count_cache_timeout"
+    seconds per user and permissions, or from the estimate of the query planner
+    where the database provides one.
+    """
+
+    permission_required: str | Iterable[str]
+    get_permission_required = ObjectPermissionRequiredMixin.get_permission_required
+
+    keyset_field: Optional[str] = None
+    cursor_kwarg = "after"
+    count_strategy = COUNT_EXACT
+    count_cache_timeout: Optional[int] = 60
+    next_cursor = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        for perm in self.get_permission_required():
+            queryset = filter_perm_qs_for_user(queryset, self.request.user, perm)
+        return queryset
+
+    def get_count_cache_key(self) -> str:
+        """
+        Return the cache key of the count. Views whose queryset depends on more
+        than the user, such as search parameters, should add them to it.
+        """
+        return "{}-count-{}-{}-{}".format(
+            get_config("CACHE_PREFIX_KEY", CACHE_KEY_PREFIX),
+            f"{self.__class__.__module__}.{self.__class__.__qualname__}",
+            self.request.user.pk,
+            ",".join(sorted(self.get_permission_required())),
+        )
+
+    def get_count(self, queryset) -> int:
+        if self.count_strategy == COUNT_ESTIMATED:
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                return estimate
+        elif self.count_strategy == COUNT_CACHED:
+            key = self.get_count_cache_key()
+            count = orca_cache().get(key)
+            if count is None:
+                count = queryset.count()
+                orca_cache().set(key, count, self.count_cache_timeout)
+            return count
+        return queryset.count()
+
+    def get_paginator(self, queryset, *args, **kwargs):
+        paginator = super().get_paginator(queryset, *args, **kwargs)
+        if self.count_strategy != COUNT_EXACT:
+            # Paginator.count is a cached_property, set it before it is computed
+            paginator.count = self.get_count(queryset)
+        return paginator
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.keyset_field is None:
+            return super().paginate_queryset(queryset, page_size)
+
+        field = self.keyset_field.lstrip("-")
+        lookup = "lt" if self.keyset_field.startswith("-") else "gt"
+        queryset = queryset.order_by(self.keyset_field)
+
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        if cursor:
+            try:
+                queryset = queryset.filter(**{f"{field}__{lookup}": cursor})
+            except (ValueError, ValidationError):
+                raise Http404("Invalid cursor.")
+
+        # One extra row tells whether there is a next page.
+        object_list = list(queryset[: page_size + 1])
+        has_next = len(object_list) > page_size
+        object_list = object_list[:page_size]
+        if has_next:
+            self.next_cursor = getattr(object_list[-1], field)
+        # Every page but a single one is paginated, the last included.
+        return (None, None, object_list, bool(cursor) or has_next)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = self.next_cursor
+        return context
+
+
+async def aget_request_user(request):
+    """
+    Return the user of "request" without a synchronous database access.
+    """
+    if hasattr(request, "auser"):
+        return await request.auser()
+    # Django < 5.0, evaluate the lazy user in a thread.
+    await sync_to_async(getattr)(request.user, "pk")
+    return request.user
+
+
+async def auser_has_perm(user, perm, obj=None) -> bool:
+    """
+    Async version of "user.has_perm", asking every authentication backend in turn.
+    Backends without an "ahas_perm" method are called in a thread.
+    """
+    if user.is_active and getattr(user, "is_superuser", False):
+        return True
+
+    for backend in auth.get_backends():
+        if hasattr(backend, "ahas_perm"):
+            check = backend.ahas_perm
+        elif hasattr(backend, "has_perm"):
+            check = sync_to_async(backend.has_perm)
+        else:
+            continue  # pragma: no cover
+        try:
+            if await check(user, perm, obj):
+                return True
+        except PermissionDenied:
+            return False
+    return False
+
+
+class AsyncPermissionObjectMixin(AccessMixin):
+    login_url = settings.LOGIN_URL
+    return_404 = False
+
+    async def aget_permission_object(self):
         if hasattr(self, "permission_object"):
             return getattr(self, "permission_object")
 
@@ -86,24 +296,58 @@ class ObjectRoleRequiredMixin(AccessMixin):
             if object := getattr(self, "object"):
                 return object
 
+        elif hasattr(self, "aget_object"):
+            return await getattr(self, "aget_object")()
+
         elif hasattr(self, "get_object"):
-            return getattr(self, "get_object")()
+            return await sync_to_async(getattr(self, "get_object"))()
 
         raise ImproperlyConfigured(  # pragma: no cover
             "Provide a 'permission_object' attribute or implement "
-            "a 'get_permission_object' method."
+            "a 'aget_permission_object' method."
         )
 
-    def has_permission(self):
-        return has_role(
-            self.request.user, self.get_role_required(), self.get_permission_object()
-        )
-
-    def dispatch(self, request, *args, **kwargs):
-        if not self.has_permission():
+    async def dispatch(self, request, *args, **kwargs):
+        if not await self.ahas_permission():
             if self.return_404:
                 raise Http404
             else:
                 raise PermissionDenied
         else:
-            return super().dispatch(request, *args, **kwargs)
+            return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncObjectPermissionRequiredMixin(AsyncPermissionObjectMixin):
+    """
+    Async version of ObjectPermissionRequiredMixin, for views with async handlers.
+    The permissions are checked concurrently.
+    """
+
+    permission_required: str | Iterable[str]
+    get_permission_required = ObjectPermissionRequiredMixin.get_permission_required
+
+    async def ahas_permission(self):
+        user = await aget_request_user(self.request)
+        obj = await self.aget_permission_object()
+        results = await asyncio.gather(
+            *[
+                auser_has_perm(user, perm, obj)
+                for perm in self.get_permission_required()
+            ]
+        )
+        return all(results)
+
+
+class AsyncObjectRoleRequiredMixin(AsyncPermissionObjectMixin):
+    """
+    Async version of ObjectRoleRequiredMixin, for views with async handlers.
+    """
+
+    role_required: Type[Role]
+    get_role_required = ObjectRoleRequiredMixin.get_role_required
+
+    async def ahas_permission(self):
+        user = await aget_request_user(self.request)
+        return await ahas_role(
+            user, self.get_role_required(), await self.aget_permission_object()
+        )